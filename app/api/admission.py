@@ -0,0 +1,172 @@
+# app/api/admission.py
+
+import asyncio
+import logging
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+# Degradation levels, applied cumulatively as the queue fills up
+NORMAL = 0
+REDUCE_TOP_K = 1        # retrieve fewer chunks -> shorter prompts
+SKIP_OPTIONAL = 2       # no parent expansion, no hedged LLM requests
+CACHE_OR_RETRIEVAL = 3  # cached answer if we have one, otherwise no LLM call
+
+
+class Overloaded(Exception):
+    """The query queue is full - the caller should retry later."""
+
+    def __init__(self, retry_after_s: int):
+        super().__init__(f"Server overloaded, retry after {retry_after_s}s")
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionController:
+    """
+    Admission control for /query.
+
+    Each stage (e.g. retrieval, generation) has its own concurrency limit.
+    Admitted requests waiting for a stage form the queue; when the queue
+    is full new requests are rejected, and as it fills up admitted
+    requests are told to degrade (see the level constants above) so the
+    backlog drains instead of every request slowing down together.
+    """
+
+    def __init__(self, stage_limits: dict[str, int], max_queue: int, retry_after_s: int = 2):
+        """
+        Args:
+            stage_limits: Max concurrent requests per stage name
+            max_queue: Max requests waiting for a stage before rejecting
+            retry_after_s: Retry-After hint sent with rejections
+        """
+        self.stage_limits = dict(stage_limits)
+        self.max_queue = max_queue
+        self.retry_after_s = retry_after_s
+        self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in stage_limits.items()}
+        self._in_flight = 0
+        self._running = Counter()  # stage -> requests holding a permit
+        self._rejected = 0
+        self._degraded = Counter()  # level -> requests admitted at that level
+
+    def queue_depth(self) -> int:
+        """Admitted requests not currently running in any stage."""
+        return self._in_flight - sum(self._running.values())
+
+    def degradation_level(self) -> int:
+        """How much to degrade a request admitted now, from queue pressure."""
+        if self.max_queue <= 0:
+            return NORMAL
+        pressure = self.queue_depth() / self.max_queue
+        if pressure < 0.25:
+            return NORMAL
+        if pressure < 0.5:
+            return REDUCE_TOP_K
+        if pressure < 0.75:
+            return SKIP_OPTIONAL
+        return CACHE_OR_RETRIEVAL
+
+    @asynccontextmanager
+    async def admit(self):
+        """
+        Admit one request for its whole lifetime.
+
+        Yields:
+            The degradation level the request should run at
+
+        Raises:
+            Overloaded: If the queue is full
+        """
+        if self.queue_depth() >= self.max_queue:
+            self._rejected += 1
+            raise Overloaded(self.retry_after_s)
+
+        level = self.degradation_level()
+        self._degraded[level] += 1
+        if level:
+            logger.warning(f"Query admitted degraded (level {level}) | queue depth {self.queue_depth()}")
+
+        self._in_flight += 1
+        try:
+            yield level
+        finally:
+            self._in_flight -= 1
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """Hold one of the stage's concurrency permits, waiting in the queue if needed."""
+        async with self._semaphores[name]:
+            self._running[name] += 1
+            try:
+                yield
+            finally:
+                self._running[name] -= 1
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth(),
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "rejected_total": self._rejected,
+            "stage_running": {name: self._running[name] for name in self.stage_limits},
+            "stage_limits": dict(self.stage_limits),
+            "admitted_by_level": {level: self._degraded[level] for level in range(CACHE_OR_RETRIEVAL + 1)}
+        }
+
+    def prometheus_metrics(self) -> str:
+        """metrics() in Prometheus text exposition format."""
+        m = self.metrics()
+        lines = [
+            "# HELP rag_query_queue_depth Admitted queries waiting for a stage.",
+            "# TYPE rag_query_queue_depth gauge",
+            f"rag_query_queue_depth {m['queue_depth']}",
+            "# HELP rag_query_queue_limit Queue depth at which queries are rejected.",
+            "# TYPE rag_query_queue_limit gauge",
+            f"rag_query_queue_limit {m['max_queue']}",
+            "# HELP rag_query_in_flight Admitted queries, waiting or running.",
+            "# TYPE rag_query_in_flight gauge",
+            f"rag_query_in_flight {m['in_flight']}",
+            "# HELP rag_query_rejected_total Queries rejected with 429.",
+            "# TYPE rag_query_rejected_total counter",
+            f"rag_query_rejected_total {m['rejected_total']}",
+            "# HELP rag_query_stage_running Queries running in each stage.",
+            "# TYPE rag_query_stage_running gauge",
+        ]
+        lines += [f'rag_query_stage_running{{stage="{s}"}} {n}' for s, n in m["stage_running"].items()]
+        lines += [
+            "# HELP rag_query_admitted_total Admitted queries by degradation level.",
+            "# TYPE rag_query_admitted_total counter",
+        ]
+        lines += [f'rag_query_admitted_total{{level="{lvl}"}} {n}' for lvl, n in m["admitted_by_level"].items()]
+        return "\n".join(lines) + "\n"
+
+
+class AnswerCache:
+    """
+    Small LRU of recent LLM answers, served instead of calling the LLM
+    when the server is overloaded.
+
+    Keys should include something that changes when the index does
+    (e.g. its chunk count), so answers from before an ingest aren't served.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, key: tuple) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, response: dict) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
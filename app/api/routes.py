@@ -2,48 +2,122 @@
 
 import logging
 import shutil
+from functools import partial
 from pathlib import Path
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import List
 
+from app.api.admission import (
+    AdmissionController, AnswerCache, Overloaded,
+    REDUCE_TOP_K, SKIP_OPTIONAL, CACHE_OR_RETRIEVAL
+)
+from app.ingestion.uploads import stream_upload, load_manifest
+from app.embeddings.embedder import normalize_query
 from app.retrieval.retriever import Retriever
+from app.retrieval.collection_manager import (
+    CollectionManager, migrate_legacy_layout, validate_collection_name
+)
+from app.jobs.store import JobStore
+from app.jobs.runner import JobRunner
+from app.llm.backends import LLMError
 from app.llm.generator import generate_answer
-from config import DATA_DIR, INDEX_DIR
+from config import (
+    DATA_DIR, INDEX_DIR, DEFAULT_COLLECTION, COLLECTION_MEMORY_BUDGET_MB,
+    UPLOAD_CHUNK_BYTES, JOBS_DIR, JOBS_DB_PATH, EMBED_BATCH_SIZE, PARENT_CHUNK_SIZE,
+    QUERY_MAX_RETRIEVALS, QUERY_MAX_GENERATIONS, QUERY_MAX_QUEUE, QUERY_RETRY_AFTER_S,
+    QUERY_DEGRADED_TOP_K, ANSWER_CACHE_SIZE
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize retriever and attempt to load saved index
-retriever = Retriever()
-ingested_files = []
+# Each collection has its own index and snapshot under INDEX_DIR/<name>.
+# Snapshots are loaded lazily on first query, so nothing is read at startup.
+# A snapshot from before collections existed becomes the default collection.
+migrate_legacy_layout(INDEX_DIR, DATA_DIR, DEFAULT_COLLECTION)
+collections = CollectionManager(
+    index_root=INDEX_DIR,
+    memory_budget_bytes=COLLECTION_MEMORY_BUDGET_MB * 1024 * 1024,
+    retriever_factory=partial(Retriever, parent_size=PARENT_CHUNK_SIZE or None)
+)
+# Build one retriever up front, so chunk settings the chunker would reject
+# (e.g. PARENT_CHUNK_SIZE below the chunk size) fail at startup instead of
+# failing every ingestion job
+collections.retriever_factory()
 
-# Try to load persisted index on startup
-if retriever.store.load(INDEX_DIR):
-    is_index_built = True
-    logger.info("Restored index from disk on startup")
-else:
-    is_index_built = False
-    logger.info("No saved index found — starting fresh")
+# Ingestion runs as persisted background jobs - started/stopped in main.py
+jobs = JobStore(JOBS_DB_PATH)
+job_runner = JobRunner(
+    store=jobs,
+    collections=collections,
+    data_root=DATA_DIR,
+    checkpoint_root=JOBS_DIR / "checkpoints",
+    batch_size=EMBED_BATCH_SIZE
+)
+
+# Queries are admitted per stage; past the queue limit they get 429, and
+# as the queue fills they're answered more cheaply (see app/api/admission.py)
+admission = AdmissionController(
+    stage_limits={"retrieval": QUERY_MAX_RETRIEVALS, "generation": QUERY_MAX_GENERATIONS},
+    max_queue=QUERY_MAX_QUEUE,
+    retry_after_s=QUERY_RETRY_AFTER_S
+)
+answer_cache = AnswerCache(max_size=ANSWER_CACHE_SIZE)
 
 
 class QueryRequest(BaseModel):
     question: str
     top_k: int = 3
+    collection: str = DEFAULT_COLLECTION
 
 
 class QueryResponse(BaseModel):
-    answer: str
+    answer: str | None  # None when only retrieval results could be served
     sources: list[dict]
-    model: str
+    model: str | None
+    degraded: list[str] = []  # shortcuts taken because the server was busy
+
+
+def _collection_or_400(name: str) -> str:
+    try:
+        return validate_collection_name(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
+def _collection_files(name: str) -> list[str]:
+    data_dir = DATA_DIR / name
+    if not data_dir.exists():
+        return []
+    return sorted(p.name for p in data_dir.glob("*.pdf"))
 
-@router.post("/ingest")
-async def ingest_pdfs(files: List[UploadFile] = File(...)):
-    global retriever, is_index_built, ingested_files
 
-    saved_paths = []
+def _drop_collection(name: str) -> None:
+    # Delete the collection snapshot and its uploaded files. Holding the
+    # collection's lock means a job that is indexing right now finishes
+    # first, and one that hasn't started sees its cancel flag and stops -
+    # neither can write the snapshot or manifest back after this.
+    with collections.lock(name):
+        collections.drop(name)
+        shutil.rmtree(DATA_DIR / name, ignore_errors=True)
+
+
+@router.post("/ingest", status_code=202)
+async def ingest_pdfs(
+    files: List[UploadFile] = File(...),
+    collection: str = Form(DEFAULT_COLLECTION)
+):
+    collection = _collection_or_400(collection)
+    data_dir = DATA_DIR / collection
+
+    try:
+        collections.check_granularity(collection)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
     for file in files:
         if not file.filename.endswith(".pdf"):
@@ -51,78 +125,202 @@ async def ingest_pdfs(files: List[UploadFile] = File(...)):
                 status_code=400,
                 detail=f"{file.filename} is not a PDF."
             )
-        save_path = DATA_DIR / file.filename
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        with open(save_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
-        saved_paths.append(str(save_path))
-        ingested_files.append(file.filename)
-        logger.info(f"PDF saved: {save_path}")
-
-    retriever = Retriever()
-    all_paths = [str(DATA_DIR / f) for f in ingested_files]
-    retriever.build_index(all_paths)
-    is_index_built = True
-
-    # Save index to disk immediately after building
-    retriever.store.save(INDEX_DIR)
-    logger.info("Index persisted to disk")
+
+    # Already indexed or already queued content is skipped
+    known_hashes = {**load_manifest(data_dir), **jobs.pending_hashes(collection)}
+    documents = []
+    skipped_duplicates = []
+
+    try:
+        for file in files:
+            try:
+                upload = await stream_upload(
+                    file,
+                    data_dir,
+                    known_hashes,
+                    chunk_bytes=UPLOAD_CHUNK_BYTES
+                )
+            except FileExistsError as e:
+                raise HTTPException(status_code=409, detail=str(e))
+
+            if upload["duplicate"]:
+                skipped_duplicates.append(file.filename)
+                continue
+
+            known_hashes[upload["sha256"]] = upload["filename"]
+            documents.append(upload)
+    except HTTPException:
+        # Don't leave files behind that no job will index - a retry would hit 409
+        for doc in documents:
+            Path(doc["path"]).unlink(missing_ok=True)
+        raise
+
+    job_id = jobs.create_job(collection, documents) if documents else None
+    if job_id:
+        job_runner.wake()
 
     return {
-        "message": f"Successfully ingested {len(saved_paths)} file(s)",
-        "files_ingested": saved_paths,
-        "total_files_in_index": len(ingested_files),
-        "total_chunks": retriever.store.total_chunks()
+        "message": f"Queued {len(documents)} file(s) for ingestion",
+        "collection": collection,
+        "job_id": job_id,
+        "files_queued": [d["filename"] for d in documents],
+        "skipped_duplicates": skipped_duplicates
     }
 
 
+@router.get("/jobs")
+async def list_jobs(collection: str | None = None, limit: int = 20):
+    if collection is not None:
+        collection = _collection_or_400(collection)
+    return {"jobs": jobs.list_jobs(collection, limit=limit)}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    for doc in job["documents"]:
+        doc.pop("path")  # server-side detail
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    if jobs.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    if not job_runner.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} has already finished.")
+    return {"message": f"Cancellation requested for job {job_id}."}
+
+
 @router.delete("/ingest/reset")
-async def reset_index():
-    global retriever, is_index_built, ingested_files
+async def reset_index(collection: str = DEFAULT_COLLECTION):
+    collection = _collection_or_400(collection)
 
-    retriever = Retriever()
-    is_index_built = False
-    ingested_files = []
+    for job_id in jobs.active_job_ids(collection):
+        job_runner.cancel(job_id)
 
-    # Delete saved index files
-    index_path = INDEX_DIR / "faiss.index"
-    chunks_path = INDEX_DIR / "chunks.json"
-    if index_path.exists():
-        index_path.unlink()
-    if chunks_path.exists():
-        chunks_path.unlink()
+    await run_in_threadpool(_drop_collection, collection)
 
-    return {"message": "Index reset successfully."}
+    return {"message": f"Collection '{collection}' reset successfully."}
 
 
 @router.post("/query", response_model=QueryResponse)
 async def query(request: QueryRequest):
-    if not is_index_built:
+    collection = _collection_or_400(request.collection)
+    # A cold collection is read from disk - keep that off the event loop
+    retriever = await run_in_threadpool(collections.get, collection)
+    if retriever is None:
         raise HTTPException(
             status_code=400,
-            detail="No documents ingested yet. Call /ingest first."
+            detail=f"No documents ingested into '{collection}' yet. Call /ingest first."
         )
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty.")
 
-    logger.info(f"Query received: {request.question}")
-    results = retriever.search(request.question, top_k=request.top_k)
-    response = generate_answer(request.question, results)
+    logger.info(f"Query received [{collection}]: {request.question}")
+    try:
+        async with admission.admit() as level:
+            return await _answer(request, collection, retriever, level)
+    except Overloaded as e:
+        logger.warning(f"Query rejected - queue full ({admission.queue_depth()} waiting)")
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_s)}
+        )
+
+
+async def _answer(request: QueryRequest, collection: str, retriever: Retriever, level: int) -> QueryResponse:
+    # Degradation steps are cumulative - see the levels in app/api/admission.py
+    degraded = []
+    top_k = request.top_k
+    if level >= REDUCE_TOP_K and top_k > QUERY_DEGRADED_TOP_K:
+        top_k = QUERY_DEGRADED_TOP_K
+        degraded.append("top_k_reduced")
+    skip_optional = level >= SKIP_OPTIONAL
+    if skip_optional:
+        degraded.append("optional_stages_skipped")
+
+    # Keyed on the context the answer is actually built from (top_k and
+    # whether parents were expanded), so an answer from reduced context is
+    # never served as a full one. The chunk count changes on every ingest,
+    # so stale answers never match either.
+    question = normalize_query(request.question)
+    chunks = retriever.store.total_chunks()
+    has_parents = retriever.store.has_parents()
+    cache_key = (collection, question, top_k, has_parents and not skip_optional, chunks)
+    if level >= CACHE_OR_RETRIEVAL:
+        # Under overload any cached answer beats none - prefer the one built
+        # from the full requested context, then the reduced ones
+        candidates = [
+            (collection, question, request.top_k, has_parents, chunks),
+            (collection, question, top_k, has_parents, chunks),
+            (collection, question, top_k, False, chunks)
+        ]
+        for key in candidates:
+            cached = answer_cache.get(key)
+            if cached is not None:
+                return QueryResponse(**cached, degraded=degraded + ["cached_answer"])
+
+    async with admission.stage("retrieval"):
+        # Off the event loop, so the retrieval limit actually bounds CPU work
+        results = await run_in_threadpool(
+            retriever.search, request.question, top_k=top_k, expand_parents=not skip_optional
+        )
+
+    if level >= CACHE_OR_RETRIEVAL:
+        # No LLM call - hand back the passages themselves
+        return QueryResponse(
+            answer=None,
+            sources=[
+                {"source": r["source"], "page": r["page"], "score": r.get("score", 0), "text": r["text"]}
+                for r in results
+            ],
+            model=None,
+            degraded=degraded + ["retrieval_only"]
+        )
+
+    async with admission.stage("generation"):
+        try:
+            response = await generate_answer(request.question, results, hedge=not skip_optional)
+        except LLMError as e:
+            logger.error(f"LLM failed: {e}")
+            raise HTTPException(status_code=502, detail="The language model is unavailable. Try again later.")
+
+    answer_cache.put(cache_key, response)
 
     return QueryResponse(
         answer=response["answer"],
         sources=response["sources"],
-        model=response["model"]
+        model=response["model"],
+        degraded=degraded
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return admission.prometheus_metrics() + (
+        "# HELP rag_answer_cache_entries Answers kept for serving under overload.\n"
+        "# TYPE rag_answer_cache_entries gauge\n"
+        f"rag_answer_cache_entries {len(answer_cache)}\n"
     )
 
 
 @router.get("/health")
-async def health():
+async def health(collection: str = DEFAULT_COLLECTION):
+    collection = _collection_or_400(collection)
+    retriever = await run_in_threadpool(collections.get, collection)
+    index_built = retriever is not None
     return {
         "status": "ok",
-        "index_built": is_index_built,
-        "files_ingested": ingested_files,
-        "total_chunks": retriever.store.total_chunks() if is_index_built else 0
+        "collection": collection,
+        "index_built": index_built,
+        "files_ingested": _collection_files(collection),
+        "total_chunks": retriever.store.total_chunks() if index_built else 0,
+        "collections": collections.list_collections(),
+        "resident_collections": collections.resident_collections()
     }
 # Update `.gitignore` to exclude index files
 
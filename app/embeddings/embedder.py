@@ -1,9 +1,14 @@
 # app/embeddings/embedder.py
 
 import logging
+import threading
+import unicodedata
+from collections import OrderedDict
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
+from config import QUERY_CACHE_SIZE
+
 logger = logging.getLogger(__name__)
 
 # We load the model once at module level - not inside the function
@@ -13,13 +18,44 @@ MODEL_NAME = "all-MiniLM-L6-v2"
 model = SentenceTransformer(MODEL_NAME)
 logger.info(f"Loaded embedding model: {MODEL_NAME}")
 
+# Exact-match LRU of query vectors. Dashboards and saved searches send the
+# same strings over and over, and running the model is the slow part.
+# Keyed by (model name, normalized query) so switching models can't return
+# stale vectors.
+_query_cache: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+_query_cache_lock = threading.Lock()
+_query_cache_stats = {"hits": 0, "misses": 0}
+
+# Other models are only loaded on demand (e.g. by the evaluation harness)
+_extra_models: dict[str, SentenceTransformer] = {}
+_extra_models_lock = threading.Lock()
 
-def embed_texts(texts: list[str]) -> np.ndarray:
+
+def get_model(model_name: str = MODEL_NAME) -> SentenceTransformer:
+    """
+    Return the SentenceTransformer for model_name, loading it once on first use.
+    The default model is the one loaded at import time.
+    """
+    if model_name == MODEL_NAME:
+        return model
+    with _extra_models_lock:
+        if model_name not in _extra_models:
+            _extra_models[model_name] = SentenceTransformer(model_name)
+            logger.info(f"Loaded embedding model: {model_name}")
+        return _extra_models[model_name]
+
+
+def embedding_dim(model_name: str = MODEL_NAME) -> int:
+    return get_model(model_name).get_sentence_embedding_dimension()
+
+
+def embed_texts(texts: list[str], model_name: str = MODEL_NAME) -> np.ndarray:
     """
     Convert a list of text strings into embedding vectors.
 
     Args:
         texts: List of strings to embed
+        model_name: Embedding model to use
 
     Returns:
         numpy array of shape (len(texts), embedding_dim)
@@ -29,18 +65,32 @@ def embed_texts(texts: list[str]) -> np.ndarray:
         raise ValueError("Cannot embed an empty list of texts")
 
     logger.info(f"Embedding {len(texts)} texts...")
-    embeddings = model.encode(texts, show_progress_bar=True)
+    embeddings = get_model(model_name).encode(texts, show_progress_bar=True)
     logger.info(f"Embeddings shape: {embeddings.shape}")
     return embeddings
 
 
-def embed_query(query: str) -> np.ndarray:
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a query used as the cache key: Unicode NFC with
+    leading/trailing whitespace removed and inner runs collapsed to one space.
+    """
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+def embed_query(query: str, model_name: str = MODEL_NAME) -> np.ndarray:
     """
     Embed a single query string.
     Kept separate from embed_texts for clarity - queries are always single strings.
 
+    Repeated queries are served from an LRU cache without calling the model.
+    The returned vector is already L2-normalized float32 and C-contiguous,
+    so it can be passed to FAISSVectorStore.search(..., normalized=True).
+    Callers must not modify it in place - it may be shared with the cache.
+
     Args:
         query: The user's question
+        model_name: Embedding model to use
 
     Returns:
         numpy array of shape (1, embedding_dim)
@@ -48,4 +98,54 @@ def embed_query(query: str) -> np.ndarray:
     if not query.strip():
         raise ValueError("Query cannot be empty")
 
-    return model.encode([query])
\ No newline at end of file
+    key = (model_name, normalize_query(query))
+
+    with _query_cache_lock:
+        cached = _query_cache.get(key)
+        if cached is not None:
+            _query_cache.move_to_end(key)
+            _query_cache_stats["hits"] += 1
+            return cached
+        _query_cache_stats["misses"] += 1
+
+    vector = get_model(model_name).encode([key[1]], normalize_embeddings=True)
+    vector = np.ascontiguousarray(vector, dtype=np.float32)
+
+    with _query_cache_lock:
+        _query_cache[key] = vector
+        while len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+
+    return vector
+
+
+def embed_queries(queries: list[str], model_name: str = MODEL_NAME) -> np.ndarray:
+    """
+    Embed many queries in one batch, e.g. for offline evaluation.
+    Bypasses the query cache so timings reflect real model cost.
+
+    Returns:
+        L2-normalized float32 array of shape (len(queries), embedding_dim)
+    """
+    if not queries:
+        raise ValueError("Cannot embed an empty list of queries")
+    if any(not q.strip() for q in queries):
+        raise ValueError("Query cannot be empty")
+
+    vectors = get_model(model_name).encode(
+        [normalize_query(q) for q in queries],
+        normalize_embeddings=True
+    )
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def query_cache_info() -> dict:
+    """Hit/miss counters and current size of the query embedding cache."""
+    with _query_cache_lock:
+        return {**_query_cache_stats, "size": len(_query_cache), "max_size": QUERY_CACHE_SIZE}
+
+
+def clear_query_cache() -> None:
+    with _query_cache_lock:
+        _query_cache.clear()
+        _query_cache_stats.update(hits=0, misses=0)
@@ -0,0 +1,93 @@
+# app/evaluation/__main__.py
+#
+# Offline retrieval evaluation. Example:
+#
+#   python -m app.evaluation --pdfs data/raw/*.pdf --golden golden.jsonl \
+#       --chunk-sizes 300 500 800 --overlaps 0 50 --index-types Flat HNSW32 \
+#       --quality-metric recall@5 --quality-bar 0.8
+
+import argparse
+import json
+import logging
+
+from app.embeddings.embedder import MODEL_NAME
+from app.evaluation.harness import load_golden_set, build_grid, run_grid, select_fastest
+from config import LOG_LEVEL
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.evaluation",
+        description="Grid-search retrieval settings against a labeled query set."
+    )
+    parser.add_argument("--pdfs", nargs="+", required=True, help="PDFs forming the evaluation corpus")
+    parser.add_argument("--golden", required=True, help="JSONL file of labeled queries")
+    parser.add_argument("--chunk-sizes", nargs="+", type=int, default=[500])
+    parser.add_argument("--overlaps", nargs="+", type=int, default=[50])
+    parser.add_argument("--parent-sizes", nargs="+", type=int, default=[0],
+                        help="Parent section sizes for parent-document retrieval (0 = flat index)")
+    parser.add_argument("--index-types", nargs="+", default=["Flat"],
+                        help="FAISS index_factory strings, e.g. Flat HNSW32 IVF64,Flat")
+    parser.add_argument("--models", nargs="+", default=[MODEL_NAME])
+    parser.add_argument("--k", nargs="+", type=int, default=[1, 3, 5], help="Cut-offs for recall@k and nDCG@k")
+    parser.add_argument("--workers", type=int, default=1, help="Configurations evaluated in parallel")
+    parser.add_argument("--quality-metric", default=None, help="e.g. recall@5, ndcg@3 or mrr")
+    parser.add_argument("--quality-bar", type=float, default=0.0)
+    parser.add_argument("--output", default=None, help="Write all results to this JSON file")
+    return parser.parse_args()
+
+
+def print_table(results: list[dict], k_values: list[int]) -> None:
+    metric_cols = ["mrr"] + [f"recall@{k}" for k in k_values] + [f"ndcg@{k}" for k in k_values]
+    header = (["chunk", "overlap", "parent", "index", "model"] + metric_cols
+              + ["ms/query", "context chars", "index KB", "build s"])
+    print(" | ".join(header))
+
+    for r in sorted(results, key=lambda r: r.get("query_latency_ms", float("inf"))):
+        row = [
+            str(r["chunk_size"]), str(r["overlap"]), str(r["parent_size"]),
+            r["index_type"], r["model_name"]
+        ]
+        if "error" in r:
+            print(" | ".join(row + [f"ERROR: {r['error']}"]))
+            continue
+        row += [f"{r[m]:.3f}" for m in metric_cols]
+        row += [
+            f"{r['query_latency_ms']:.2f}", f"{r['context_chars']:.0f}",
+            f"{r['index_bytes'] / 1024:.0f}", f"{r['build_seconds']:.1f}"
+        ]
+        print(" | ".join(row))
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(
+        level=LOG_LEVEL,
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+    )
+
+    golden = load_golden_set(args.golden)
+    configs = build_grid(args.chunk_sizes, args.overlaps, args.index_types, args.models, args.parent_sizes)
+    if not configs:
+        raise SystemExit("No valid configurations - check overlaps and parent sizes against chunk sizes.")
+
+    results = run_grid(configs, args.pdfs, golden, args.k, workers=args.workers)
+    print_table(results, args.k)
+
+    if args.quality_metric:
+        best = select_fastest(results, args.quality_metric, args.quality_bar)
+        if best is None:
+            print(f"\nNo configuration reaches {args.quality_metric} >= {args.quality_bar}")
+        else:
+            print(f"\nFastest configuration with {args.quality_metric} >= {args.quality_bar}: "
+                  f"chunk_size={best['chunk_size']} overlap={best['overlap']} parent_size={best['parent_size']} "
+                  f"index_type={best['index_type']} model={best['model_name']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# app/evaluation/harness.py
+
+import itertools
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.ingestion.pdf_loader import load_pdf
+from app.embeddings.embedder import embedding_dim
+from app.retrieval.retriever import Retriever
+from app.evaluation.metrics import recall_at_k, reciprocal_rank, ndcg_at_k, mean
+
+logger = logging.getLogger(__name__)
+
+
+def load_golden_set(path: str | Path) -> list[dict]:
+    """
+    Read a labeled query set from a JSONL file, one query per line:
+    {"query": "...", "relevant": [{"source": "file.pdf", "page": 3}, ...]}
+
+    Returns:
+        List of {"query": str, "relevant": set of (source, page)}
+    """
+    golden = []
+    with open(path, "r") as f:
+        for line_num, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if not entry.get("query", "").strip() or not entry.get("relevant"):
+                raise ValueError(f"{path}:{line_num}: need a non-empty 'query' and 'relevant' list")
+            golden.append({
+                "query": entry["query"],
+                "relevant": {(r["source"], int(r["page"])) for r in entry["relevant"]}
+            })
+
+    if not golden:
+        raise ValueError(f"Golden set is empty: {path}")
+    logger.info(f"Loaded {len(golden)} golden queries from {path}")
+    return golden
+
+
+def build_grid(
+    chunk_sizes: list[int],
+    overlaps: list[int],
+    index_types: list[str],
+    model_names: list[str],
+    parent_sizes: list[int] | None = None
+) -> list[dict]:
+    """
+    Every combination of settings to evaluate. A parent_size of 0 means a
+    flat index. Combinations the chunker would reject (overlap >= chunk_size,
+    or parents smaller than their children) are left out.
+    """
+    return [
+        {"chunk_size": c, "overlap": o, "parent_size": p, "index_type": i, "model_name": m}
+        for c, o, p, i, m in itertools.product(
+            chunk_sizes, overlaps, parent_sizes or [0], index_types, model_names
+        )
+        if o < c and (p == 0 or p >= c)
+    ]
+
+
+def evaluate_config(config: dict, pages: list[dict], golden: list[dict], k_values: list[int]) -> dict:
+    """
+    Build an index for one configuration and score it on the golden set.
+
+    Args:
+        config: One entry from build_grid()
+        pages: Extracted pages of the evaluation corpus (shared by all configs)
+        golden: Output of load_golden_set()
+        k_values: Cut-offs to report recall@k and nDCG@k for
+
+    Returns:
+        The config plus num_chunks, index_bytes, build_seconds,
+        query_latency_ms (mean per query, batched), context_chars (mean
+        text handed to the LLM at the largest k), mrr, recall@k and ndcg@k.
+        If the index can't be built, an "error" key instead of metrics.
+    """
+    result = dict(config)
+    try:
+        retriever = Retriever(
+            chunk_size=config["chunk_size"],
+            overlap=config["overlap"],
+            embedding_dim=embedding_dim(config["model_name"]),
+            model_name=config["model_name"],
+            index_type=config["index_type"],
+            parent_size=config.get("parent_size") or None
+        )
+
+        start = time.perf_counter()
+        retriever.add_pages(pages)
+        result["build_seconds"] = time.perf_counter() - start
+
+        queries = [g["query"] for g in golden]
+        start = time.perf_counter()
+        hits = retriever.search_many(queries, top_k=max(k_values))
+        result["query_latency_ms"] = (time.perf_counter() - start) * 1000 / len(queries)
+    except Exception as e:
+        # e.g. an IVF index with more lists than the corpus has chunks
+        logger.warning(f"Config {config} failed: {e}")
+        result["error"] = str(e)
+        return result
+
+    ranked = [[(h["source"], h["page"]) for h in query_hits] for query_hits in hits]
+
+    result["num_chunks"] = retriever.store.total_chunks()
+    result["index_bytes"] = retriever.store.index_bytes()
+    result["context_chars"] = mean([sum(len(h["text"]) for h in query_hits) for query_hits in hits])
+    result["mrr"] = mean([reciprocal_rank(r, g["relevant"]) for r, g in zip(ranked, golden)])
+    for k in k_values:
+        result[f"recall@{k}"] = mean([recall_at_k(r, g["relevant"], k) for r, g in zip(ranked, golden)])
+        result[f"ndcg@{k}"] = mean([ndcg_at_k(r, g["relevant"], k) for r, g in zip(ranked, golden)])
+
+    logger.info(f"Evaluated {config} | mrr={result['mrr']:.3f} | "
+                f"latency={result['query_latency_ms']:.2f}ms/query")
+    return result
+
+
+def run_grid(
+    configs: list[dict],
+    pdf_paths: list[str],
+    golden: list[dict],
+    k_values: list[int],
+    workers: int = 1
+) -> list[dict]:
+    """
+    Evaluate all configurations, `workers` at a time.
+
+    The PDFs are parsed once and shared. Embedding and FAISS search release
+    the GIL, so configurations run in parallel threads - but they compete for
+    CPU, so use workers=1 when latency numbers need to be comparable.
+
+    Returns:
+        One result dict per config, in the same order as configs
+    """
+    pages = []
+    for path in pdf_paths:
+        pages.extend(load_pdf(path))
+    if not pages:
+        raise ValueError("No text was extracted from the provided PDFs.")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(lambda c: evaluate_config(c, pages, golden, k_values), configs))
+
+
+def select_fastest(results: list[dict], metric: str, quality_bar: float) -> dict | None:
+    """
+    Pick the lowest-latency configuration whose metric meets the quality bar.
+
+    Returns:
+        The winning result, or None if no configuration is good enough
+    """
+    passing = [
+        r for r in results
+        if "error" not in r and r.get(metric, 0.0) >= quality_bar
+    ]
+    return min(passing, key=lambda r: r["query_latency_ms"], default=None)
@@ -0,0 +1,69 @@
+# app/evaluation/metrics.py
+
+import math
+
+# Relevance is judged per (source, page), not per chunk, so the same golden
+# set works for any chunk_size/overlap. Several chunks from one relevant page
+# only count once - the first time the page shows up in the ranking.
+
+
+def _first_hits(retrieved: list, relevant: set, k: int) -> list[bool]:
+    """For each of the top k results: is it a relevant item seen for the first time?"""
+    seen = set()
+    hits = []
+    for item in retrieved[:k]:
+        hit = item in relevant and item not in seen
+        seen.add(item)
+        hits.append(hit)
+    return hits
+
+
+def recall_at_k(retrieved: list, relevant: set, k: int) -> float:
+    """
+    Fraction of relevant items that appear in the top k results.
+
+    Args:
+        retrieved: Ranked list of item ids (e.g. (source, page) tuples)
+        relevant: Set of relevant item ids
+        k: Cut-off
+
+    Returns:
+        Value in [0, 1]; 0 if there are no relevant items
+    """
+    if not relevant:
+        return 0.0
+    return sum(_first_hits(retrieved, relevant, k)) / len(relevant)
+
+
+def reciprocal_rank(retrieved: list, relevant: set, k: int | None = None) -> float:
+    """
+    1 / rank of the first relevant result (0 if none in the top k).
+    Averaged over queries this gives MRR.
+    """
+    cutoff = len(retrieved) if k is None else k
+    for rank, item in enumerate(retrieved[:cutoff], start=1):
+        if item in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(retrieved: list, relevant: set, k: int) -> float:
+    """
+    Normalized discounted cumulative gain with binary relevance.
+
+    Returns:
+        Value in [0, 1] - 1 means all relevant items are ranked first
+    """
+    if not relevant:
+        return 0.0
+    dcg = sum(
+        1.0 / math.log2(rank + 1)
+        for rank, hit in enumerate(_first_hits(retrieved, relevant, k), start=1)
+        if hit
+    )
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal
+
+
+def mean(values: list[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
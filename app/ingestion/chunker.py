@@ -58,4 +58,54 @@ def chunk_text(
 
     logger.info(f"Created {len(chunks)} chunks from {len(pages)} pages "
                 f"(chunk_size={chunk_size}, overlap={overlap})")
-    return chunks
\ No newline at end of file
+    return chunks
+
+
+def chunk_hierarchical(
+    pages: list[dict],
+    parent_size: int = 2000,
+    child_size: int = 500,
+    overlap: int = 50
+) -> tuple[list[dict], list[dict]]:
+    """
+    Two-level chunking: each page is cut into non-overlapping parent
+    sections, and each section into small overlapping child chunks.
+    Children are embedded and searched; their parents are what the LLM sees.
+
+    Args:
+        pages: Output from load_pdf() - list of page dicts
+        parent_size: Number of characters per parent section
+        child_size: Number of characters per child chunk
+        overlap: Characters shared between consecutive children of a section
+
+    Returns:
+        (parents, children). Parents look like
+        {"parent_id": 0, "text": "...", "source": "file.pdf", "page": 1},
+        children like chunk_text() output plus the "parent_id" they belong to.
+    """
+    if parent_size < child_size:
+        raise ValueError("parent_size must be at least child_size")
+
+    parents = []
+    for page in pages:
+        text = page["text"]
+        for start in range(0, len(text), parent_size):
+            section = text[start:start + parent_size]
+            if section.strip():
+                parents.append({
+                    "parent_id": len(parents),
+                    "text": section,
+                    "source": page["source"],
+                    "page": page["page"]
+                })
+
+    children = []
+    for parent in parents:
+        for child in chunk_text([parent], child_size, overlap):
+            child["chunk_id"] = len(children)
+            child["parent_id"] = parent["parent_id"]
+            children.append(child)
+
+    logger.info(f"Created {len(parents)} parent sections and {len(children)} child chunks "
+                f"(parent_size={parent_size}, child_size={child_size}, overlap={overlap})")
+    return parents, children
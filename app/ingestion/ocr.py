@@ -0,0 +1,242 @@
+# app/ingestion/ocr.py
+
+import hashlib
+import logging
+import multiprocessing
+import multiprocessing.pool
+import queue
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+import fitz  # PyMuPDF
+
+from config import (
+    OCR_ENABLED, OCR_WORKERS, OCR_DPI, OCR_LANGUAGE, OCR_DOC_BUDGET_S, OCR_CACHE_DIR
+)
+
+logger = logging.getLogger(__name__)
+
+# An OCR engine takes a PNG of one page and the DPI it was rendered at,
+# and returns its text. It runs in a worker process, so it must be a
+# module-level (picklable) function.
+OCREngine = Callable[[bytes, int], str]
+
+
+def tesseract_ocr(image_png: bytes, dpi: int = OCR_DPI, language: str = OCR_LANGUAGE) -> str:
+    """
+    OCR one page image with PyMuPDF's Tesseract integration.
+    Needs Tesseract installed (and TESSDATA_PREFIX set if it isn't found).
+
+    Args:
+        image_png: The rendered page
+        dpi: Resolution the page was rendered at - OCR works at the same one
+        language: Tesseract language code(s)
+    """
+    with fitz.open(stream=image_png, filetype="png") as image:
+        pdf_bytes = image.convert_to_pdf()
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf:
+        page = pdf[0]
+        textpage = page.get_textpage_ocr(language=language, dpi=dpi, full=True)
+        return page.get_text(textpage=textpage).strip()
+
+
+class OCRCache:
+    """
+    OCR results on disk, keyed by a hash of the page image and the engine
+    (with its settings), so re-ingesting the same scans doesn't OCR them again.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+
+    def get(self, key: str) -> str | None:
+        path = self.directory / f"{key}.txt"
+        return path.read_text(encoding="utf-8") if path.exists() else None
+
+    def put(self, key: str, text: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{key}.txt"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        tmp_path.replace(path)
+
+
+class PageOCR:
+    """
+    OCR stage for pages without extractable text.
+
+    Pages are rendered in this process, then OCR'd in a process pool.
+    Results are cached by page-image hash, and each document gets a time
+    budget: pages are only sent to the pool while the budget lasts, at
+    most one per worker at a time. Pages still running when it runs out
+    are stopped (the pool is restarted) and skipped, so they can't eat
+    into the next document's budget. Failed pages are logged and skipped.
+    """
+
+    def __init__(
+        self,
+        engine: OCREngine = tesseract_ocr,
+        cache_dir: str | Path = OCR_CACHE_DIR,
+        workers: int = OCR_WORKERS,
+        dpi: int = OCR_DPI,
+        doc_budget_s: float = OCR_DOC_BUDGET_S,
+        engine_settings: str | None = None
+    ):
+        """
+        Args:
+            engine: Function turning a page PNG into text
+            cache_dir: Folder for cached OCR results
+            workers: Size of the process pool. 0 runs OCR inline in this
+                     process, where the budget is only checked between pages.
+            dpi: Resolution pages are rendered at before OCR
+            doc_budget_s: Max seconds spent on OCR per document
+            engine_settings: Settings the engine's output depends on, added to
+                             the cache key. Defaults to OCR_LANGUAGE for the
+                             Tesseract engine.
+        """
+        self.engine = engine
+        if engine_settings is None and engine is tesseract_ocr:
+            engine_settings = f"language={OCR_LANGUAGE}"
+        self.engine_settings = engine_settings or ""
+        self.cache = OCRCache(cache_dir)
+        self.workers = workers
+        self.dpi = dpi
+        self.doc_budget_s = doc_budget_s
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # One document at a time in the pool, so budgets don't overlap
+        self._document_lock = threading.Lock()
+
+    def ocr_pages(self, doc: fitz.Document, page_numbers: list[int], source: str) -> dict[int, str]:
+        """
+        OCR the given pages of an open document.
+
+        Args:
+            doc: Open PyMuPDF document
+            page_numbers: 1-based page numbers that need OCR
+            source: File name, for logging
+
+        Returns:
+            Dict of page number -> text, for pages that produced text in time
+        """
+        with self._document_lock:
+            deadline = time.monotonic() + self.doc_budget_s
+            texts = {}
+            results = queue.SimpleQueue()  # (page number, cache key, text or None)
+            in_flight = 0
+            cache_hits = 0
+
+            for page_num in page_numbers:
+                # Wait for a free worker, so nothing sits queued past the budget
+                while in_flight >= max(self.workers, 1) and time.monotonic() < deadline:
+                    in_flight -= self._collect(results, texts, deadline)
+                if time.monotonic() >= deadline:
+                    break
+
+                image_png = doc[page_num - 1].get_pixmap(dpi=self.dpi).tobytes("png")
+                key = self._cache_key(image_png)
+
+                cached = self.cache.get(key)
+                if cached is not None:
+                    texts[page_num] = cached
+                    cache_hits += 1
+                elif self.workers == 0:
+                    try:
+                        text = self.engine(image_png, self.dpi)
+                    except Exception as e:
+                        logger.warning(f"OCR failed for {source} page {page_num}: {e}")
+                        continue
+                    self._store(texts, page_num, key, text)
+                else:
+                    self._get_pool().apply_async(
+                        self.engine,
+                        (image_png, self.dpi),
+                        callback=lambda text, n=page_num, k=key: results.put((n, k, text)),
+                        error_callback=partial(self._on_error, results, source, page_num, key)
+                    )
+                    in_flight += 1
+
+            while in_flight and time.monotonic() < deadline:
+                in_flight -= self._collect(results, texts, deadline)
+            if in_flight:
+                # Running pages can't be cancelled - stop their workers instead
+                logger.warning(f"Stopping {in_flight} OCR page(s) of {source} still running at the budget")
+                self.shutdown()
+
+        skipped = len(page_numbers) - len(texts)
+        logger.info(f"OCR'd {len(texts)}/{len(page_numbers)} scanned pages of {source} "
+                    f"({cache_hits} from cache)")
+        if skipped:
+            logger.warning(f"{skipped} scanned page(s) of {source} not OCR'd "
+                           f"(failed or over the {self.doc_budget_s}s budget)")
+
+        return {n: t.strip() for n, t in texts.items() if t.strip()}
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+                self._pool = None
+
+    @staticmethod
+    def _on_error(results: queue.SimpleQueue, source: str, page_num: int, key: str, error: BaseException) -> None:
+        # Same as inline mode: log the failed page and skip it
+        logger.warning(f"OCR failed for {source} page {page_num}: {error}")
+        results.put((page_num, key, None))
+
+    def _collect(self, results: queue.SimpleQueue, texts: dict[int, str], deadline: float) -> int:
+        # Wait for one pool result until the deadline. Returns 1 if one came in.
+        try:
+            page_num, key, text = results.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            return 0
+        if text is not None:
+            self._store(texts, page_num, key, text)
+        return 1
+
+    def _store(self, texts: dict[int, str], page_num: int, key: str, text: str) -> None:
+        texts[page_num] = text
+        self.cache.put(key, text)
+
+    def _cache_key(self, image_png: bytes) -> str:
+        digest = hashlib.sha256(image_png)
+        # Include the engine and its settings, so switching engines or
+        # e.g. the OCR language doesn't reuse old results
+        name = getattr(self.engine, "__qualname__", type(self.engine).__qualname__)
+        digest.update(f"{self.engine.__module__}.{name}|{self.engine_settings}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _get_pool(self) -> multiprocessing.pool.Pool:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn, not fork - forking a process that has torch/FAISS
+                # threads running can deadlock the child. multiprocessing's
+                # Pool (unlike ProcessPoolExecutor) can terminate busy workers.
+                self._pool = multiprocessing.get_context("spawn").Pool(processes=self.workers)
+            return self._pool
+
+
+_default_ocr: PageOCR | None = None
+_default_ocr_lock = threading.Lock()
+
+
+def default_page_ocr() -> PageOCR | None:
+    """The shared OCR stage, or None if OCR_ENABLED is off."""
+    global _default_ocr
+    if not OCR_ENABLED:
+        return None
+    with _default_ocr_lock:
+        if _default_ocr is None:
+            _default_ocr = PageOCR()
+        return _default_ocr
+
+
+def shutdown_page_ocr() -> None:
+    """Stop the shared OCR worker processes, if they were started."""
+    with _default_ocr_lock:
+        if _default_ocr is not None:
+            _default_ocr.shutdown()
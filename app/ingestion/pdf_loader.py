@@ -4,15 +4,19 @@ import logging
 from pathlib import Path
 import fitz  # PyMuPDF
 
+from app.ingestion.ocr import PageOCR, default_page_ocr
+
 logger = logging.getLogger(__name__)
 
 
-def load_pdf(file_path: str | Path) -> list[dict]:
+def load_pdf(file_path: str | Path, ocr: PageOCR | None = None) -> list[dict]:
     """
     Extract text from a PDF file, page by page.
 
     Args:
         file_path: Path to the PDF file.
+        ocr: OCR stage for pages without a text layer. Defaults to the
+             shared one when OCR_ENABLED is on, otherwise such pages are skipped.
 
     Returns:
         List of dicts, one per page:
@@ -26,30 +30,77 @@ def load_pdf(file_path: str | Path) -> list[dict]:
     if file_path.suffix.lower() != ".pdf":
         raise ValueError(f"Expected a .pdf file, got: {file_path.suffix}")
 
+    try:
+        doc = fitz.open(file_path)
+    except Exception as e:
+        logger.error(f"Failed to process PDF {file_path.name}: {e}")
+        raise
+
+    return _extract_pages(doc, file_path.name, ocr)
+
+
+def load_pdf_bytes(data: bytes, source: str, ocr: PageOCR | None = None) -> list[dict]:
+    """
+    Extract text from a PDF that is already in memory, page by page.
+    Stored uploads go through load_pdf(), which lets MuPDF read large
+    files lazily instead of holding a full copy in memory.
+
+    Args:
+        data: Raw PDF bytes
+        source: File name recorded on each page (e.g. "file.pdf")
+        ocr: Same as for load_pdf()
+
+    Returns:
+        Same format as load_pdf()
+    """
+    if not data:
+        raise ValueError(f"PDF is empty: {source}")
+
+    try:
+        doc = fitz.open(stream=data, filetype="pdf")
+    except Exception as e:
+        logger.error(f"Failed to process PDF {source}: {e}")
+        raise
+
+    return _extract_pages(doc, source, ocr)
+
+
+def _extract_pages(doc: fitz.Document, source: str, ocr: PageOCR | None = None) -> list[dict]:
     pages = []
+    scanned = []
 
     try:
-        doc = fitz.open(file_path)
-        logger.info(f"Opened PDF: {file_path.name} | Pages: {len(doc)}")
+        logger.info(f"Opened PDF: {source} | Pages: {len(doc)}")
 
         for page_num, page in enumerate(doc, start=1):
             text = page.get_text().strip()
 
             if not text:
                 logger.warning(f"Page {page_num} has no extractable text - possibly scanned.")
+                scanned.append(page_num)
                 continue
 
             pages.append({
                 "page": page_num,
                 "text": text,
-                "source": file_path.name
+                "source": source
             })
 
-        doc.close()
+        # OCR only the pages that need it - it's far slower than text extraction
+        ocr = ocr or default_page_ocr()
+        if scanned and ocr is not None:
+            ocr_texts = ocr.ocr_pages(doc, scanned, source)
+            pages.extend(
+                {"page": page_num, "text": text, "source": source}
+                for page_num, text in ocr_texts.items()
+            )
+            pages.sort(key=lambda p: p["page"])
 
     except Exception as e:
-        logger.error(f"Failed to process PDF {file_path.name}: {e}")
+        logger.error(f"Failed to process PDF {source}: {e}")
         raise
+    finally:
+        doc.close()
 
-    logger.info(f"Extracted {len(pages)} pages with text from {file_path.name}")
-    return pages
\ No newline at end of file
+    logger.info(f"Extracted {len(pages)} pages with text from {source}")
+    return pages
@@ -0,0 +1,116 @@
+# app/ingestion/uploads.py
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+
+import anyio
+from fastapi import UploadFile
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def load_manifest(directory: str | Path) -> dict[str, str]:
+    """
+    Read the content-hash manifest of a collection's upload folder.
+
+    Returns:
+        Dict mapping sha256 hex digest -> stored file name
+    """
+    manifest_path = Path(directory) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(directory: str | Path, manifest: dict[str, str]) -> None:
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+async def stream_upload(
+    file: UploadFile,
+    dest_dir: str | Path,
+    known_hashes: dict[str, str],
+    chunk_bytes: int = 1024 * 1024
+) -> dict:
+    """
+    Stream an upload to disk in fixed-size chunks, hashing it on the fly.
+
+    The file is written to a uniquely named '.part' file with async I/O, so
+    the event loop isn't blocked and concurrent uploads of the same name
+    don't share a temp file. Once complete it is hard-linked to its final
+    name, which fails atomically if that name is already taken.
+    Nothing is kept in memory - the ingestion job opens the stored file by
+    path, and MuPDF reads its pages from disk as they're needed.
+
+    Args:
+        file: The incoming upload
+        dest_dir: Folder to store the PDF in
+        known_hashes: sha256 -> file name of files already stored in dest_dir
+        chunk_bytes: How much to read from the request per step
+
+    Returns:
+        Dict with filename, path, sha256, size and duplicate (True if the
+        same content was already stored - nothing is written in that case)
+
+    Raises:
+        FileExistsError: If a different file with the same name is already stored
+    """
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+
+    filename = Path(file.filename).name
+    final_path = dest_dir / filename
+    part_path = dest_dir / f".{filename}.{uuid.uuid4().hex}.part"
+
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with await anyio.open_file(part_path, "wb") as out:
+            while chunk := await file.read(chunk_bytes):
+                digest.update(chunk)
+                size += len(chunk)
+                await out.write(chunk)
+    except BaseException:
+        await anyio.Path(part_path).unlink(missing_ok=True)
+        raise
+
+    sha256 = digest.hexdigest()
+    result = {
+        "filename": filename,
+        "path": str(final_path),
+        "sha256": sha256,
+        "size": size,
+        "duplicate": sha256 in known_hashes
+    }
+
+    if result["duplicate"]:
+        await anyio.Path(part_path).unlink(missing_ok=True)
+        result["filename"] = known_hashes[sha256]
+        result["path"] = str(dest_dir / known_hashes[sha256])
+        logger.info(f"Skipping duplicate upload {filename} (same content as {known_hashes[sha256]})")
+        return result
+
+    try:
+        await anyio.to_thread.run_sync(os.link, part_path, final_path)
+    except FileExistsError:
+        # Same name, different content - the old chunks would be left behind
+        raise FileExistsError(
+            f"{filename} already exists with different content. "
+            f"Reset the collection or upload it under another name."
+        ) from None
+    finally:
+        await anyio.Path(part_path).unlink(missing_ok=True)
+
+    logger.info(f"PDF saved: {final_path} ({size} bytes, sha256={sha256[:12]})")
+    return result
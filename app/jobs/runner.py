@@ -0,0 +1,260 @@
+# app/jobs/runner.py
+
+import json
+import logging
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.ingestion.pdf_loader import load_pdf
+from app.ingestion.uploads import load_manifest, save_manifest
+from app.embeddings.embedder import embed_texts
+from app.retrieval.collection_manager import CollectionManager
+from app.jobs.store import JobStore
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested."""
+
+
+class JobRunner:
+    """
+    Background worker that runs queued ingestion jobs one at a time.
+
+    Each document is chunked once and embedded in batches. Every batch is
+    saved to checkpoint_root/<job id>/ as soon as it's embedded, so a job
+    interrupted by a crash or restart resumes from its last batch instead
+    of starting over. Cancellation is checked between batches.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        collections: CollectionManager,
+        data_root: str | Path,
+        checkpoint_root: str | Path,
+        batch_size: int = 256,
+        poll_interval_s: float = 2.0
+    ):
+        self.store = store
+        self.collections = collections
+        self.data_root = Path(data_root)
+        self.checkpoint_root = Path(checkpoint_root)
+        self.batch_size = batch_size
+        self.poll_interval_s = poll_interval_s
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Resume interrupted jobs and start the worker thread."""
+        if self._thread is not None:
+            return
+        self.store.requeue_interrupted()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="ingest-job-runner", daemon=True)
+        self._thread.start()
+        logger.info("Job runner started")
+
+    def stop(self, timeout: float | None = 10.0) -> None:
+        """
+        Ask the worker to stop. A job in progress is interrupted at its next
+        checkpoint and stays 'running', so it's requeued on the next start().
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self) -> None:
+        """Pick up newly queued jobs now rather than at the next poll."""
+        self._wake.set()
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job. A running job stops and cleans up at its next
+        checkpoint. A queued one is never picked up by the worker, so its
+        uploads are discarded here - otherwise re-uploading them would hit
+        the "already exists" check.
+
+        Returns:
+            False if the job doesn't exist or has already finished
+        """
+        if not self.store.request_cancel(job_id):
+            return False
+        if self.store.get_job(job_id)["status"] == "cancelled":
+            self._discard(job_id, self.checkpoint_root / job_id)
+        return True
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            job_id = None
+            try:
+                job_id = self.store.claim_next()
+                if job_id is None:
+                    self._wake.wait(self.poll_interval_s)
+                    self._wake.clear()
+                    continue
+                self.run_job(job_id)
+            except Exception as e:
+                # Keep the worker alive - if this thread died, the job would
+                # stay 'running' and nothing queued after it would ever run
+                logger.exception(f"Job runner error (job {job_id})")
+                if job_id is not None:
+                    self._mark_failed(job_id, e)
+                self._stop.wait(self.poll_interval_s)  # e.g. the database is locked - don't spin
+
+    def _mark_failed(self, job_id: str, error: Exception) -> None:
+        try:
+            if self.store.get_job(job_id)["status"] == "running":
+                self.store.set_status(job_id, "failed", error=str(error))
+        except Exception:
+            logger.exception(f"Could not mark job {job_id} failed")
+
+    def run_job(self, job_id: str) -> None:
+        """Run one claimed job to completion, cancellation or failure."""
+        job = self.store.get_job(job_id)
+        logger.info(f"Running job {job_id} | collection={job['collection']}")
+        checkpoint_dir = self.checkpoint_root / job_id
+
+        try:
+            # Fail before embedding anything if the chunks can't be added
+            self.collections.check_granularity(job["collection"])
+            for doc in job["documents"]:
+                if doc["status"] in ("embedded", "indexed", "failed"):
+                    continue  # finished before a restart
+                self._embed_document(job_id, doc, checkpoint_dir)
+
+            self._index_documents(job, checkpoint_dir)
+
+        except JobCancelled:
+            if self._stop.is_set() and not self.store.is_cancel_requested(job_id):
+                logger.info(f"Job {job_id} interrupted by shutdown - will resume on restart")
+                return
+            logger.info(f"Job {job_id} cancelled")
+            self._discard(job_id, checkpoint_dir)
+            self.store.set_status(job_id, "cancelled")
+            return
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            self._discard(job_id, checkpoint_dir)
+            self.store.set_status(job_id, "failed", error=str(e))
+            return
+
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+        self._remove_failed_uploads(job_id)
+        self.store.set_status(job_id, "completed")
+        logger.info(f"Job {job_id} completed")
+
+    def _check_cancel(self, job_id: str) -> None:
+        if self._stop.is_set() or self.store.is_cancel_requested(job_id):
+            raise JobCancelled(job_id)
+
+    def _embed_document(self, job_id: str, doc: dict, checkpoint_dir: Path) -> None:
+        position = doc["position"]
+        chunks_path = checkpoint_dir / f"doc{position}.chunks.json"
+        # Chunk settings and embedding model come from the collection's retriever type
+        template = self.collections.retriever_factory()
+
+        if chunks_path.exists():
+            with open(chunks_path, "r") as f:
+                chunks = json.load(f)["chunks"]
+        else:
+            try:
+                pages = load_pdf(doc["path"])
+            except Exception as e:
+                # One unreadable PDF shouldn't sink the rest of the job
+                logger.warning(f"Job {job_id}: could not read {doc['filename']}: {e}")
+                self.store.update_document(job_id, position, status="failed", error=str(e))
+                return
+            chunks, parents = template.chunk_pages(pages)
+            checkpoint_dir.mkdir(parents=True, exist_ok=True)
+            with open(chunks_path, "w") as f:
+                json.dump({"chunks": chunks, "parents": parents}, f)
+
+        self.store.update_document(job_id, position, status="embedding", chunks_total=len(chunks))
+
+        for batch_num, start in enumerate(range(0, len(chunks), self.batch_size)):
+            batch_path = checkpoint_dir / f"doc{position}.batch{batch_num}.npy"
+            end = min(start + self.batch_size, len(chunks))
+            if not batch_path.exists():
+                self._check_cancel(job_id)
+                embeddings = embed_texts(
+                    [c["text"] for c in chunks[start:end]],
+                    model_name=template.model_name
+                )
+                # Write then rename, so a crash never leaves a half-written batch
+                tmp_path = batch_path.with_suffix(".tmp")
+                with open(tmp_path, "wb") as f:
+                    np.save(f, np.asarray(embeddings, dtype=np.float32))
+                tmp_path.replace(batch_path)
+            self.store.update_document(job_id, position, chunks_embedded=end)
+
+        self.store.update_document(job_id, position, status="embedded")
+
+    def _index_documents(self, job: dict, checkpoint_dir: Path) -> None:
+        # Append all embedded documents to the collection in one go and
+        # persist the snapshot, then record them in the upload manifest.
+        # Runs under the collection's lock, which reset also takes - a reset
+        # either waits for this to finish or cancels the job before it starts.
+        collection = job["collection"]
+        with self.collections.lock(collection):
+            self._check_cancel(job["id"])
+            job = self.store.get_job(job["id"])
+            data_dir = self.data_root / collection
+            manifest = load_manifest(data_dir)
+
+            retriever = self.collections.get_or_create(collection)
+            # Stored file names are unique per collection, so a document whose
+            # name is already a chunk source was added before a crash
+            in_snapshot = {c["source"] for c in retriever.store.chunks}
+            indexed = []
+            for doc in job["documents"]:
+                if doc["status"] != "embedded":
+                    continue
+                if doc["sha256"] in manifest or doc["filename"] in in_snapshot:
+                    indexed.append(doc)  # added before a crash - don't add twice
+                    continue
+                position = doc["position"]
+                with open(checkpoint_dir / f"doc{position}.chunks.json", "r") as f:
+                    checkpoint = json.load(f)
+                chunks = checkpoint["chunks"]
+                if not chunks:
+                    indexed.append(doc)  # no text at all - nothing to add
+                    continue
+                batches = sorted(
+                    checkpoint_dir.glob(f"doc{position}.batch*.npy"),
+                    key=lambda p: int(p.stem.rsplit("batch", 1)[1])
+                )
+                embeddings = np.concatenate([np.load(p) for p in batches])
+                retriever.add_embedded(chunks, embeddings, checkpoint["parents"])
+                indexed.append(doc)
+
+            if retriever.is_built:
+                self.collections.put(collection, retriever)
+            for doc in indexed:
+                manifest[doc["sha256"]] = doc["filename"]
+            save_manifest(data_dir, manifest)
+            for doc in indexed:
+                self.store.update_document(job["id"], doc["position"], status="indexed")
+
+    def _discard(self, job_id: str, checkpoint_dir: Path) -> None:
+        # Remove checkpoints and the uploads that never made it into the
+        # index, so the same files can be uploaded again.
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+        job = self.store.get_job(job_id)
+        for doc in job["documents"]:
+            if doc["status"] != "indexed":
+                Path(doc["path"]).unlink(missing_ok=True)
+
+    def _remove_failed_uploads(self, job_id: str) -> None:
+        # Documents that couldn't be read aren't indexed or in the manifest -
+        # remove them so a fixed file can be uploaded under the same name.
+        for doc in self.store.get_job(job_id)["documents"]:
+            if doc["status"] == "failed":
+                Path(doc["path"]).unlink(missing_ok=True)
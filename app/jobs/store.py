@@ -0,0 +1,253 @@
+# app/jobs/store.py
+
+import logging
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Job status flow: queued -> running -> completed | failed | cancelled
+# Document status flow: pending -> embedding -> embedded -> indexed | failed
+ACTIVE_STATUSES = ("queued", "running")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    collection TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_documents (
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    position INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    chunks_total INTEGER,
+    chunks_embedded INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    PRIMARY KEY (job_id, position)
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs(status, created_at);
+"""
+
+
+class JobStore:
+    """
+    Persists ingestion jobs and per-document progress in SQLite, so
+    jobs survive worker restarts and can be polled from any process.
+    """
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call - safe across threads
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create_job(self, collection: str, documents: list[dict]) -> str:
+        """
+        Queue a new ingestion job.
+
+        Args:
+            collection: Collection the documents are ingested into
+            documents: Dicts with filename, path and sha256 of each stored upload
+
+        Returns:
+            The new job id
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, collection, status, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, collection, now, now)
+            )
+            conn.executemany(
+                "INSERT INTO job_documents (job_id, position, filename, path, sha256) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (job_id, position, d["filename"], d["path"], d["sha256"])
+                    for position, d in enumerate(documents)
+                ]
+            )
+        logger.info(f"Queued job {job_id} | collection={collection} | {len(documents)} document(s)")
+        return job_id
+
+    def get_job(self, job_id: str) -> dict | None:
+        """
+        Job status with per-document progress.
+
+        Returns:
+            Dict with id, collection, status, error, cancel_requested,
+            created_at, updated_at, progress (0-1) and documents - or None
+        """
+        with self._connect() as conn:
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            documents = conn.execute(
+                "SELECT position, filename, path, sha256, status, chunks_total, chunks_embedded, error "
+                "FROM job_documents WHERE job_id = ? ORDER BY position",
+                (job_id,)
+            ).fetchall()
+
+        job = dict(job)
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        job["documents"] = [dict(d) for d in documents]
+        job["progress"] = _progress(job["status"], job["documents"])
+        return job
+
+    def list_jobs(self, collection: str | None = None, limit: int = 20) -> list[dict]:
+        """Most recent jobs first, without per-document detail."""
+        query = "SELECT * FROM jobs"
+        params = []
+        if collection is not None:
+            query += " WHERE collection = ?"
+            params.append(collection)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def claim_next(self) -> str | None:
+        """
+        Atomically move the oldest queued job to running.
+
+        Returns:
+            Its id, or None if nothing is queued
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at, rowid LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', updated_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (time.time(), row["id"])
+            ).rowcount
+        return row["id"] if claimed else None
+
+    def requeue_interrupted(self) -> int:
+        """
+        Put jobs left 'running' by a crashed or restarted worker back in
+        the queue. Their checkpoints let them resume where they stopped.
+
+        Returns:
+            Number of jobs requeued
+        """
+        with self._connect() as conn:
+            count = conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running'",
+                (time.time(),)
+            ).rowcount
+        if count:
+            logger.info(f"Requeued {count} interrupted job(s)")
+        return count
+
+    def set_status(self, job_id: str, status: str, error: str | None = None) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+
+    def update_document(self, job_id: str, position: int, **fields) -> None:
+        """Update status, chunks_total, chunks_embedded and/or error of one document."""
+        allowed = {"status", "chunks_total", "chunks_embedded", "error"}
+        if not fields or not set(fields) <= allowed:
+            raise ValueError(f"Can only update {sorted(allowed)}, got {sorted(fields)}")
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE job_documents SET {assignments} WHERE job_id = ? AND position = ?",
+                (*fields.values(), job_id, position)
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def request_cancel(self, job_id: str) -> bool:
+        """
+        Ask for a job to stop. Queued jobs are cancelled straight away;
+        running ones stop at the next checkpoint.
+
+        Returns:
+            False if the job doesn't exist or has already finished
+        """
+        now = time.time()
+        with self._connect() as conn:
+            queued = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', cancel_requested = 1, updated_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (now, job_id)
+            ).rowcount
+            running = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? "
+                "WHERE id = ? AND status = 'running'",
+                (now, job_id)
+            ).rowcount
+        return bool(queued or running)
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def active_job_ids(self, collection: str) -> list[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id FROM jobs WHERE collection = ? AND status IN {ACTIVE_STATUSES}",
+                (collection,)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def pending_hashes(self, collection: str) -> dict[str, str]:
+        """
+        sha256 -> filename of documents in queued or running jobs, so a
+        second upload of the same content isn't queued twice.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT d.sha256, d.filename FROM job_documents d JOIN jobs j ON j.id = d.job_id "
+                f"WHERE j.collection = ? AND j.status IN {ACTIVE_STATUSES}",
+                (collection,)
+            ).fetchall()
+        return {row["sha256"]: row["filename"] for row in rows}
+
+
+def _progress(status: str, documents: list[dict]) -> float:
+    # Embedding is the slow part, so progress is the share of chunks embedded.
+    # Documents not chunked yet count as unknown (0 done of 1).
+    if status == "completed":
+        return 1.0
+    done = total = 0
+    for d in documents:
+        if d["status"] in ("indexed", "failed"):
+            done += 1
+            total += 1
+        elif d["chunks_total"]:
+            done += d["chunks_embedded"] / d["chunks_total"]
+            total += 1
+        else:
+            total += 1
+    return done / total if total else 0.0
@@ -0,0 +1,221 @@
+# app/llm/backends.py
+
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class LLMError(RuntimeError):
+    """The LLM backend failed to produce an answer (after retries)."""
+
+
+class RetryableLLMError(LLMError):
+    """A failure worth retrying: timeouts, connection errors, 429 and 5xx."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class GeneratorBackend(ABC):
+    """
+    Interface every LLM provider implements. generate_answer() only
+    talks to this, so providers can be swapped via LLM_BACKEND.
+    """
+
+    model: str
+
+    @abstractmethod
+    async def complete(
+        self, prompt: str, temperature: float = 0.1, max_tokens: int = 500, hedge: bool = True
+    ) -> str:
+        """
+        Return the model's completion for a single-turn prompt.
+        hedge=False turns off hedged requests for this call (used under load).
+        """
+
+    async def aclose(self) -> None:
+        """Release pooled connections. Called on application shutdown."""
+
+
+class StubBackend(GeneratorBackend):
+    """
+    Local, deterministic backend - no network, no API key.
+
+    Answers with the start of the retrieved context, tagged with a hash of
+    the prompt, so the same request always gets the same answer. Meant for
+    CI and throughput tests; delay_s can simulate LLM latency.
+    """
+
+    def __init__(self, model: str = "local-stub", delay_s: float = 0.0):
+        self.model = model
+        self.delay_s = delay_s
+
+    async def complete(
+        self, prompt: str, temperature: float = 0.1, max_tokens: int = 500, hedge: bool = True
+    ) -> str:
+        if self.delay_s:
+            await asyncio.sleep(self.delay_s)
+
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        context = prompt.split("CONTEXT:", 1)[-1].split("QUESTION:", 1)[0]
+        snippet = " ".join(context.split())[:200]
+        return f"[stub {digest}] {snippet}"
+
+
+class GroqBackend(GeneratorBackend):
+    """
+    Groq's OpenAI-compatible chat API over a pooled async HTTP client.
+
+    - Timeouts on every request, and a bounded keep-alive connection pool
+    - Retries on timeouts, connection errors, 429 and 5xx with exponential
+      backoff and full jitter (honouring Retry-After)
+    - Hedging: if a request hasn't answered by the hedge deadline, a second
+      identical request is sent and whichever finishes first wins. The
+      deadline is hedge_after_s if set, otherwise the observed p95 latency.
+    """
+
+    # Need this many successful calls before the p95 is trusted for hedging
+    MIN_LATENCY_SAMPLES = 20
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "llama-3.1-8b-instant",
+        base_url: str = "https://api.groq.com/openai/v1",
+        timeout_s: float = 30.0,
+        max_retries: int = 2,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 8.0,
+        hedge_after_s: float | None = None,
+        hedging: bool = True,
+        max_connections: int = 20,
+        transport: httpx.AsyncBaseTransport | None = None
+    ):
+        if not api_key:
+            raise LLMError("GROQ_API_KEY is not set")
+
+        self.model = model
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.hedge_after_s = hedge_after_s
+        self.hedging = hedging
+        self._latencies = deque(maxlen=500)
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=httpx.Timeout(timeout_s, connect=min(timeout_s, 5.0)),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            transport=transport
+        )
+        logger.info(f"GroqBackend ready | model={model} | timeout={timeout_s}s | "
+                    f"retries={max_retries} | pool={max_connections}")
+
+    async def complete(
+        self, prompt: str, temperature: float = 0.1, max_tokens: int = 500, hedge: bool = True
+    ) -> str:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._hedged(payload, hedge)
+            except RetryableLLMError as e:
+                if attempt == self.max_retries:
+                    raise LLMError(f"LLM request failed after {attempt + 1} attempts: {e}") from e
+                delay = self._backoff(attempt, e.retry_after)
+                logger.warning(f"LLM attempt {attempt + 1} failed ({e}) - retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    def hedge_deadline(self) -> float | None:
+        """Seconds to wait before sending a hedged request, or None to not hedge."""
+        if not self.hedging:
+            return None
+        if self.hedge_after_s is not None:
+            return self.hedge_after_s
+        if len(self._latencies) < self.MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        # Full jitter spreads retries out so clients don't retry in lockstep
+        delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max_s))
+        return delay
+
+    async def _hedged(self, payload: dict, hedge: bool = True) -> str:
+        primary = asyncio.create_task(self._post(payload))
+        tasks = {primary}
+        try:
+            deadline = self.hedge_deadline() if hedge else None
+            if deadline is None:
+                return await primary
+
+            done, _ = await asyncio.wait({primary}, timeout=deadline)
+            if done:
+                return primary.result()
+
+            logger.info(f"LLM request slower than {deadline:.2f}s - sending hedged request")
+            tasks.add(asyncio.create_task(self._post(payload)))
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Also runs when the caller is cancelled (e.g. the client went
+            # away) - don't leave requests running that nobody will read.
+            # No-op for tasks that already finished.
+            for task in tasks:
+                task.cancel()
+
+    async def _post(self, payload: dict) -> str:
+        start = time.perf_counter()
+        try:
+            response = await self._client.post("/chat/completions", json=payload)
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            raise RetryableLLMError(f"{type(e).__name__}: {e}") from e
+
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = response.headers.get("Retry-After")
+            raise RetryableLLMError(
+                f"HTTP {response.status_code}",
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None
+            )
+        if response.status_code >= 400:
+            raise LLMError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+        self._latencies.append(time.perf_counter() - start)
+        try:
+            content = response.json()["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"Malformed response body: {response.text[:200]}") from e
+        if not isinstance(content, str):
+            # e.g. "content": null
+            raise LLMError(f"Malformed response body: {response.text[:200]}")
+        return content
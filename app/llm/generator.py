@@ -2,65 +2,111 @@
 
 import os
 import logging
-from groq import Groq
-from dotenv import load_dotenv
 
-load_dotenv()  # loads .env file into environment variables
+from app.llm.backends import GeneratorBackend, GroqBackend, StubBackend
+from config import (
+    LLM_BACKEND, LLM_MODEL, LLM_TIMEOUT_S, LLM_MAX_RETRIES,
+    LLM_HEDGE_AFTER_S, LLM_MAX_CONNECTIONS
+)
 
 logger = logging.getLogger(__name__)
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Created lazily on first use - the pooled HTTP client must be created
+# inside the running event loop, and the stub backend needs no API key.
+_backend: GeneratorBackend | None = None
+
+
+def get_backend() -> GeneratorBackend:
+    """Return the configured LLM backend (LLM_BACKEND=groq|stub)."""
+    global _backend
+    if _backend is None:
+        if LLM_BACKEND == "stub":
+            _backend = StubBackend()
+        elif LLM_BACKEND == "groq":
+            _backend = GroqBackend(
+                api_key=os.getenv("GROQ_API_KEY"),
+                model=LLM_MODEL,
+                timeout_s=LLM_TIMEOUT_S,
+                max_retries=LLM_MAX_RETRIES,
+                hedge_after_s=LLM_HEDGE_AFTER_S,
+                max_connections=LLM_MAX_CONNECTIONS
+            )
+        else:
+            raise ValueError(f"Unknown LLM_BACKEND: {LLM_BACKEND!r} (expected 'groq' or 'stub')")
+    return _backend
+
+
+async def close_backend() -> None:
+    global _backend
+    if _backend is not None:
+        await _backend.aclose()
+        _backend = None
+
+
+def build_prompt(query: str, context_chunks: list[dict]) -> str:
+    """Build the grounded prompt sent to the LLM."""
+    # Build context string from retrieved chunks
+    context = "\n\n---\n\n".join([
+        f"Source: {c['source']} | Page: {c['page']}\n{c['text']}"
+        for c in context_chunks
+    ])
 
-MODEL = "llama-3.1-8b-instant"
+    # This prompt is critical - it grounds the LLM to only use provided context
+    prompt = f"""You are a helpful assistant that answers questions based ONLY on the provided context.
+If the answer is not in the context, say "I don't have enough information to answer this."
+Do NOT use your own knowledge or make up information.
 
+CONTEXT:
+{context}
 
-def generate_answer(query: str, context_chunks: list[dict]) -> dict:
+QUESTION:
+{query}
+
+ANSWER:"""
+    return prompt
+
+
+async def generate_answer(
+    query: str,
+    context_chunks: list[dict],
+    backend: GeneratorBackend | None = None,
+    hedge: bool = True
+) -> dict:
     """
     Generate a grounded answer using retrieved context chunks.
 
     Args:
         query: The user's question
         context_chunks: Retrieved chunks from the vector store
+        backend: LLM backend to use - defaults to get_backend()
+        hedge: Allow hedged LLM requests (turned off when shedding load)
 
     Returns:
         Dict with answer, sources, and model used
+
+    Raises:
+        LLMError: If the backend fails after its retries
     """
+    backend = backend or get_backend()
+
     if not context_chunks:
         return {
             "answer": "I could not find relevant information to answer your question.",
             "sources": [],
-            "model": MODEL
+            "model": backend.model
         }
 
-    # Build context string from retrieved chunks
-    context = "\n\n---\n\n".join([
-        f"Source: {c['source']} | Page: {c['page']}\n{c['text']}"
-        for c in context_chunks
-    ])
+    prompt = build_prompt(query, context_chunks)
 
-    # This prompt is critical - it grounds the LLM to only use provided context
-    prompt = f"""You are a helpful assistant that answers questions based ONLY on the provided context.
-If the answer is not in the context, say "I don't have enough information to answer this."
-Do NOT use your own knowledge or make up information.
+    logger.info(f"Sending query to {backend.model}: {query[:50]}...")
 
-CONTEXT:
-{context}
-
-QUESTION:
-{query}
-
-ANSWER:"""
-
-    logger.info(f"Sending query to {MODEL}: {query[:50]}...")
-
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
+    answer = await backend.complete(
+        prompt,
         temperature=0.1,  # low temperature = more focused, less creative
-        max_tokens=500
+        max_tokens=500,
+        hedge=hedge
     )
-
-    answer = response.choices[0].message.content.strip()
+    answer = answer.strip()
 
     sources = [
         {"source": c["source"], "page": c["page"], "score": c.get("score", 0)}
@@ -72,5 +118,5 @@ ANSWER:"""
     return {
         "answer": answer,
         "sources": sources,
-        "model": MODEL
+        "model": backend.model
     }
\ No newline at end of file
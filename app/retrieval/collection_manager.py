@@ -0,0 +1,244 @@
+# app/retrieval/collection_manager.py
+
+import logging
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+from app.retrieval.retriever import Retriever
+
+logger = logging.getLogger(__name__)
+
+# Collection names become folder names, so keep them to a safe character set
+COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def validate_collection_name(name: str) -> str:
+    """
+    Reject collection names that can't safely be used as a folder name.
+
+    Raises:
+        ValueError: If the name is empty, too long or contains e.g. '/' or '..'
+    """
+    if not COLLECTION_NAME_PATTERN.match(name or ""):
+        raise ValueError(
+            f"Invalid collection name: {name!r}. "
+            f"Use 1-64 letters, digits, '_' or '-'."
+        )
+    return name
+
+
+def migrate_legacy_layout(index_root: str | Path, data_root: str | Path, name: str) -> bool:
+    """
+    Move a snapshot from before named collections (index_root/faiss.index,
+    data_root/*.pdf) into collection `name`, so existing deployments keep
+    their documents instead of silently starting empty.
+
+    Returns:
+        True if a legacy snapshot was moved
+    """
+    index_root, data_root = Path(index_root), Path(data_root)
+    if not (index_root / "faiss.index").exists():
+        return False
+
+    target = index_root / validate_collection_name(name)
+    if (target / "faiss.index").exists():
+        logger.warning(f"Legacy snapshot in {index_root} left in place - collection '{name}' already has one")
+        return False
+
+    target.mkdir(parents=True, exist_ok=True)
+    for filename in ("faiss.index", "chunks.json", "parents.json", "parent_ids.npy"):
+        if (index_root / filename).exists():
+            (index_root / filename).replace(target / filename)
+
+    uploads = data_root / name
+    uploads.mkdir(parents=True, exist_ok=True)
+    for path in [*data_root.glob("*.pdf"), data_root / "manifest.json"]:
+        if path.is_file() and not (uploads / path.name).exists():
+            path.replace(uploads / path.name)
+
+    logger.info(f"Moved legacy snapshot from {index_root} into collection '{name}'")
+    return True
+
+
+class CollectionManager:
+    """
+    Keeps one Retriever per named collection, each with its own
+    snapshot folder under index_root.
+
+    Only hot collections stay in memory. When the estimated size of the
+    resident indexes goes over memory_budget_bytes, the least recently
+    used ones are dropped. They are reloaded lazily (memory-mapped) from
+    their snapshot the next time they are queried.
+    """
+
+    def __init__(
+        self,
+        index_root: str | Path,
+        memory_budget_bytes: int,
+        retriever_factory: Callable[[], Retriever] = Retriever
+    ):
+        self.index_root = Path(index_root)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.retriever_factory = retriever_factory
+        self._resident: OrderedDict[str, Retriever] = OrderedDict()
+        # _lock only guards the bookkeeping below and is held briefly.
+        # Loading and saving a snapshot holds just that collection's lock,
+        # so a cold load doesn't stall queries to other collections.
+        self._lock = threading.RLock()
+        self._collection_locks: dict[str, threading.RLock] = {}
+        logger.info(f"CollectionManager initialized | root={self.index_root} | "
+                    f"budget={memory_budget_bytes} bytes")
+
+    def snapshot_dir(self, name: str) -> Path:
+        return self.index_root / validate_collection_name(name)
+
+    def lock(self, name: str) -> threading.RLock:
+        """
+        The collection's own lock. Held while its snapshot is loaded, saved
+        or deleted - callers can also hold it to make a sequence of changes
+        (e.g. index then update the manifest) atomic with respect to drop().
+        """
+        with self._lock:
+            return self._collection_locks.setdefault(validate_collection_name(name), threading.RLock())
+
+    def get(self, name: str) -> Retriever | None:
+        """
+        Return the built Retriever for a collection, loading it from its
+        snapshot if it isn't resident.
+
+        Loading reads the snapshot from disk, so call this from a worker
+        thread (not the event loop) when the collection may be cold.
+
+        Returns:
+            The Retriever, or None if the collection has never been built
+        """
+        retriever = self._touch(validate_collection_name(name))
+        if retriever is not None:
+            return retriever
+
+        with self.lock(name):
+            # Another thread may have loaded it while we waited
+            retriever = self._touch(name)
+            if retriever is not None:
+                return retriever
+
+            retriever = self.retriever_factory()
+            if not retriever.load(self.snapshot_dir(name), mmap=True):
+                return None
+
+            logger.info(f"Loaded collection '{name}' from snapshot")
+            with self._lock:
+                self._admit(name, retriever)
+            return retriever
+
+    def get_or_create(self, name: str) -> Retriever:
+        """
+        Return a writable copy of a collection for ingestion, or a fresh
+        unbuilt Retriever if the collection doesn't exist yet.
+
+        The copy is read fully into memory (memory-mapped indexes can't be
+        appended to) and is separate from the resident one, so queries keep
+        using the old index until put() swaps the new one in.
+        """
+        retriever = self.retriever_factory()
+        with self.lock(name):
+            if self.snapshot_dir(name).exists():
+                retriever.load(self.snapshot_dir(name), mmap=False)
+        return retriever
+
+    def put(self, name: str, retriever: Retriever) -> None:
+        """
+        Persist a (re)built Retriever as the collection's snapshot and
+        make it the resident copy.
+        """
+        with self.lock(name):
+            retriever.store.save(self.snapshot_dir(name))
+            with self._lock:
+                self._resident.pop(name, None)
+                self._admit(name, retriever)
+
+    def drop(self, name: str) -> None:
+        """Remove a collection from memory and delete its snapshot."""
+        with self.lock(name):
+            with self._lock:
+                self._resident.pop(name, None)
+            shutil.rmtree(self.snapshot_dir(name), ignore_errors=True)
+            logger.info(f"Dropped collection '{name}'")
+
+    def check_granularity(self, name: str) -> None:
+        """
+        Make sure new documents can be added to a collection: flat and
+        parent-document chunks can't be mixed in one index, so a snapshot
+        built one way can't take chunks made the other way.
+
+        Raises:
+            ValueError: If the snapshot and the current settings disagree
+        """
+        snapshot = self.snapshot_dir(name)
+        if not (snapshot / "faiss.index").exists():
+            return
+        built_with_parents = (snapshot / "parents.json").exists()
+        wants_parents = bool(self.retriever_factory().parent_size)
+        if built_with_parents != wants_parents:
+            built, wanted = ("parent-document", "flat") if built_with_parents else ("flat", "parent-document")
+            raise ValueError(
+                f"Collection '{name}' was built as a {built} index, but the current settings "
+                f"make {wanted} chunks. Reset the collection and upload its documents again "
+                f"to rebuild it, or change PARENT_CHUNK_SIZE back."
+            )
+
+    def exists(self, name: str) -> bool:
+        with self._lock:
+            if validate_collection_name(name) in self._resident:
+                return True
+            return (self.snapshot_dir(name) / "faiss.index").exists()
+
+    def list_collections(self) -> list[str]:
+        """Names of all collections with a snapshot on disk or in memory."""
+        with self._lock:
+            names = set(self._resident)
+            if self.index_root.exists():
+                names.update(
+                    d.name for d in self.index_root.iterdir()
+                    if (d / "faiss.index").exists()
+                )
+            return sorted(names)
+
+    def resident_collections(self) -> list[str]:
+        """Resident collection names, least recently used first."""
+        with self._lock:
+            return list(self._resident)
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(r.store.memory_bytes() for r in self._resident.values())
+
+    def _touch(self, name: str) -> Retriever | None:
+        # Resident copy, marked most recently used
+        with self._lock:
+            retriever = self._resident.get(name)
+            if retriever is not None:
+                self._resident.move_to_end(name)
+            return retriever
+
+    def _admit(self, name: str, retriever: Retriever) -> None:
+        self._resident[name] = retriever
+        self._evict(keep=name)
+
+    def _evict(self, keep: str) -> None:
+        # Evict from the cold end until we fit the budget. The collection
+        # that was just touched always stays, even if it alone is too big.
+        total = self.resident_bytes()
+        while total > self.memory_budget_bytes and len(self._resident) > 1:
+            name, retriever = next(iter(self._resident.items()))
+            if name == keep:
+                self._resident.move_to_end(name)
+                continue
+            del self._resident[name]
+            total -= retriever.store.memory_bytes()
+            logger.info(f"Evicted collection '{name}' from memory "
+                        f"(resident={total} / budget={self.memory_budget_bytes} bytes)")
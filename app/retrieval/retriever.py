@@ -1,11 +1,12 @@
 # app/retrieval/retriever.py
 
 import logging
+from pathlib import Path
 import numpy as np
 
 from app.ingestion.pdf_loader import load_pdf
-from app.ingestion.chunker import chunk_text
-from app.embeddings.embedder import embed_texts, embed_query
+from app.ingestion.chunker import chunk_text, chunk_hierarchical
+from app.embeddings.embedder import MODEL_NAME, embed_texts, embed_query, embed_queries
 from app.vectorstore.faiss_store import FAISSVectorStore
 
 logger = logging.getLogger(__name__)
@@ -18,15 +19,38 @@ class Retriever:
     
     The index is built once via build_index() and then
     search() can be called any number of times efficiently.
+
+    With parent_size set, pages are split into parent sections of that
+    size and chunk_size children: children are searched, and search()
+    returns their deduplicated parent sections for generation.
     """
 
-    def __init__(self, chunk_size: int = 500, overlap: int = 50, embedding_dim: int = 384):
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        overlap: int = 50,
+        embedding_dim: int = 384,
+        model_name: str = MODEL_NAME,
+        index_type: str = "Flat",
+        parent_size: int | None = None
+    ):
+        if parent_size and parent_size < chunk_size:
+            raise ValueError(
+                f"parent_size ({parent_size}) must be at least chunk_size ({chunk_size}) - "
+                f"check PARENT_CHUNK_SIZE"
+            )
         self.chunk_size = chunk_size
         self.overlap = overlap
-        self.store = FAISSVectorStore(embedding_dim=embedding_dim)
+        self.parent_size = parent_size
+        self.model_name = model_name
+        self.store = FAISSVectorStore(embedding_dim=embedding_dim, index_type=index_type)
         self._is_built = False
         logger.info("Retriever initialized")
 
+    @property
+    def is_built(self) -> bool:
+        return self._is_built
+
     def build_index(self, pdf_paths: list[str]) -> None:
         """
         Load PDFs, chunk them, embed them, and store in FAISS.
@@ -35,37 +59,133 @@ class Retriever:
         Args:
             pdf_paths: List of paths to PDF files
         """
-        all_chunks = []
+        all_pages = []
 
         for path in pdf_paths:
             logger.info(f"Processing: {path}")
-            pages = load_pdf(path)
-            chunks = chunk_text(pages, self.chunk_size, self.overlap)
-            all_chunks.extend(chunks)
+            all_pages.extend(load_pdf(path))
+
+        self.add_pages(all_pages)
+
+    def add_pages(self, pages: list[dict]) -> int:
+        """
+        Chunk and embed already-extracted pages and append them to the
+        index. Existing chunks are kept, so only new documents get embedded.
+
+        Args:
+            pages: Output of load_pdf() / load_pdf_bytes(), possibly from several files
+
+        Returns:
+            Number of chunks added
+        """
+        all_chunks, parents = self.chunk_pages(pages)
 
         if not all_chunks:
             raise ValueError("No chunks were extracted from the provided PDFs.")
 
         texts = [c["text"] for c in all_chunks]
-        embeddings = embed_texts(texts)
-        self.store.add_chunks(all_chunks, embeddings)
+        embeddings = embed_texts(texts, model_name=self.model_name)
+        return self.add_embedded(all_chunks, embeddings, parents)
+
+    def chunk_pages(self, pages: list[dict]) -> tuple[list[dict], list[dict] | None]:
+        """
+        Split pages into chunks using this retriever's chunk settings.
+
+        Returns:
+            (chunks, parents) - parents is None unless parent_size is set
+        """
+        if self.parent_size:
+            parents, children = chunk_hierarchical(pages, self.parent_size, self.chunk_size, self.overlap)
+            return children, parents
+        return chunk_text(pages, self.chunk_size, self.overlap), None
+
+    def add_embedded(
+        self,
+        chunks: list[dict],
+        embeddings: np.ndarray,
+        parents: list[dict] | None = None
+    ) -> int:
+        """
+        Append chunks whose embeddings were computed elsewhere (e.g. in
+        checkpointed batches by an ingestion job).
+
+        Args:
+            chunks: Output of chunk_pages()
+            embeddings: One vector per chunk
+            parents: Parent sections from chunk_pages(), if any
+
+        Returns:
+            Number of chunks added
+        """
+        # chunk_text numbers from 0 on every call - keep ids unique across adds
+        for chunk_id, chunk in enumerate(chunks, start=self.store.total_chunks()):
+            chunk["chunk_id"] = chunk_id
+
+        self.store.add_chunks(chunks, embeddings, parents=parents)
         self._is_built = True
-        logger.info(f"Index built with {len(all_chunks)} total chunks")
+        logger.info(f"Index built with {self.store.total_chunks()} total chunks")
+        return len(chunks)
 
-    def search(self, query: str, top_k: int = 3) -> list[dict]:
+    def search(self, query: str, top_k: int = 3, expand_parents: bool = True) -> list[dict]:
         """
         Search the index for chunks relevant to the query.
 
         Args:
             query: The user's question
             top_k: Number of chunks to retrieve
+            expand_parents: Return parent sections when the index has them.
+                False returns the matching child chunks (shorter context)
+
+        Returns:
+            List of chunk dicts with similarity scores - parent sections
+            if the index was built with parent_size
+        """
+        if not self._is_built:
+            raise RuntimeError("Index not built. Call build_index() first.")
+
+        query_embedding = embed_query(query, model_name=self.model_name)
+        results = self.store.search(
+            query_embedding,
+            top_k=top_k,
+            normalized=True,
+            expand_parents=expand_parents and self.store.has_parents()
+        )
+        return results
+
+    def search_many(self, queries: list[str], top_k: int = 3) -> list[list[dict]]:
+        """
+        Batched search(): embeds all queries in one model call and
+        searches them in one FAISS call.
+
+        Args:
+            queries: The questions
+            top_k: Number of chunks to retrieve per question
 
         Returns:
-            List of chunk dicts with similarity scores
+            One list of chunk dicts per query, in the same order
         """
         if not self._is_built:
             raise RuntimeError("Index not built. Call build_index() first.")
 
-        query_embedding = embed_query(query)
-        results = self.store.search(query_embedding, top_k=top_k)
-        return results
\ No newline at end of file
+        query_embeddings = embed_queries(queries, model_name=self.model_name)
+        return self.store.search_many(
+            query_embeddings,
+            top_k=top_k,
+            normalized=True,
+            expand_parents=self.store.has_parents()
+        )
+
+    def load(self, directory: str | Path, mmap: bool = False) -> bool:
+        """
+        Restore a previously saved index so search() can be used
+        without calling build_index() again.
+
+        Args:
+            directory: Folder the store was saved into
+            mmap: Memory-map the index file instead of reading it into RAM
+
+        Returns:
+            True if an index was found and loaded
+        """
+        self._is_built = self.store.load(directory, mmap=mmap)
+        return self._is_built
@@ -10,44 +10,204 @@ logger = logging.getLogger(__name__)
 
 
 class FAISSVectorStore:
-    def __init__(self, embedding_dim: int = 384):
+    def __init__(self, embedding_dim: int = 384, index_type: str = "Flat"):
+        """
+        Args:
+            embedding_dim: Size of the vectors stored
+            index_type: FAISS index_factory string, e.g. "Flat" (exact search),
+                        "HNSW32" or "IVF64,Flat". Indexes that need training
+                        are trained on the first batch of vectors added.
+        """
         self.embedding_dim = embedding_dim
-        self.index = faiss.IndexFlatL2(embedding_dim)
+        self.index_type = index_type
+        if index_type == "Flat":
+            self.index = faiss.IndexFlatL2(embedding_dim)
+        else:
+            self.index = faiss.index_factory(embedding_dim, index_type, faiss.METRIC_L2)
         self.chunks = []
-        logger.info(f"Initialized FAISS IndexFlatL2 | dim={embedding_dim}")
+        # Parent-document mode: chunks are small children that are searched,
+        # parents are the larger sections handed to the LLM. parent_ids[i] is
+        # the parent of the vector at index row i.
+        self.parents = []
+        self.parent_ids = np.empty(0, dtype=np.int32)
+        logger.info(f"Initialized FAISS {index_type} index | dim={embedding_dim}")
+
+    def has_parents(self) -> bool:
+        return bool(self.parents)
 
-    def add_chunks(self, chunks: list[dict], embeddings: np.ndarray) -> None:
+    def add_chunks(
+        self,
+        chunks: list[dict],
+        embeddings: np.ndarray,
+        parents: list[dict] | None = None
+    ) -> None:
+        """
+        Args:
+            chunks: Chunk dicts, in the same order as embeddings
+            embeddings: Array of shape (len(chunks), embedding_dim)
+            parents: Parent sections for these chunks (from chunk_hierarchical()).
+                     Each chunk's "parent_id" indexes into this list; ids are
+                     re-based onto the parents already in the store.
+        """
         if len(chunks) != len(embeddings):
             raise ValueError(
                 f"chunks and embeddings must have same length. "
                 f"Got {len(chunks)} chunks and {len(embeddings)} embeddings."
             )
+        if self.index.ntotal and (parents is not None) != self.has_parents():
+            raise ValueError(
+                "Can't mix flat and parent-document chunks in one store. "
+                "Rebuild the index with a single granularity."
+            )
         vectors = np.array(embeddings).astype("float32")
         faiss.normalize_L2(vectors)
+        if not self.index.is_trained:
+            logger.info(f"Training {self.index_type} index on {len(vectors)} vectors")
+            self.index.train(vectors)
         self.index.add(vectors)
+
+        if parents is not None:
+            # Re-base copies, so the caller's chunk dicts are left as they were
+            offset = len(self.parents)
+            local_ids = np.fromiter((c["parent_id"] for c in chunks), dtype=np.int32, count=len(chunks))
+            self.parent_ids = np.concatenate([self.parent_ids, local_ids + offset])
+            chunks = [{**c, "parent_id": c["parent_id"] + offset} for c in chunks]
+            self.parents.extend({**p, "parent_id": p["parent_id"] + offset} for p in parents)
         self.chunks.extend(chunks)
         logger.info(f"Added {len(chunks)} chunks | Total in store: {len(self.chunks)}")
 
-    def search(self, query_embedding: np.ndarray, top_k: int = 3) -> list[dict]:
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 3,
+        normalized: bool = False,
+        expand_parents: bool = False
+    ) -> list[dict]:
+        """
+        Find the top_k chunks closest to the query.
+
+        Args:
+            query_embedding: Array of shape (1, embedding_dim)
+            top_k: Number of chunks to return
+            normalized: Set when the vector is already L2-normalized (e.g. from
+                        embed_query()). A C-contiguous float32 array is then
+                        searched as is, with no copy and no re-normalization.
+            expand_parents: Return the top_k distinct parent sections of the
+                            best matching children instead of the children
+        """
+        results = self.search_many(
+            query_embedding,
+            top_k=top_k,
+            normalized=normalized,
+            expand_parents=expand_parents
+        )[0]
+        logger.info(f"Retrieved {len(results)} {'parents' if expand_parents else 'chunks'} for query")
+        return results
+
+    def search_many(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = 3,
+        normalized: bool = False,
+        expand_parents: bool = False,
+        fanout: int = 4
+    ) -> list[list[dict]]:
+        """
+        Batched search - one FAISS call for all queries.
+
+        Args:
+            query_embeddings: Array of shape (n_queries, embedding_dim)
+            top_k: Number of chunks (or parents) to return per query
+            normalized: Same contract as search()
+            expand_parents: Same as search()
+            fanout: In parent mode, children retrieved per requested parent -
+                    several hits often share a parent
+
+        Returns:
+            One result list per query, in the same order
+        """
         if self.index.ntotal == 0:
             raise ValueError("Vector store is empty. Add chunks before searching.")
+        if expand_parents and not self.has_parents():
+            raise ValueError("This store has no parent sections to expand to.")
+        if expand_parents:
+            return self._search_parents(query_embeddings, top_k, normalized, fanout)
         if top_k > self.index.ntotal:
             top_k = self.index.ntotal
             logger.warning(f"top_k reduced to {top_k}")
-        query_vector = np.array(query_embedding).astype("float32")
-        faiss.normalize_L2(query_vector)
-        distances, indices = self.index.search(query_vector, top_k)
-        results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            chunk = self.chunks[idx].copy()
-            chunk["score"] = float(1 - dist / 2)
-            results.append(chunk)
-        logger.info(f"Retrieved {len(results)} chunks for query")
-        return results
+        distances, indices = self._search_vectors(query_embeddings, top_k, normalized)
+        all_results = []
+        for row_distances, row_indices in zip(distances, indices):
+            results = []
+            for dist, idx in zip(row_distances, row_indices):
+                if idx < 0:
+                    continue  # approximate indexes may return fewer than top_k hits
+                chunk = self.chunks[idx].copy()
+                chunk["score"] = float(1 - dist / 2)
+                results.append(chunk)
+            all_results.append(results)
+        return all_results
+
+    def _search_parents(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        normalized: bool,
+        fanout: int
+    ) -> list[list[dict]]:
+        n_children = min(top_k * fanout, self.index.ntotal)
+        distances, indices = self._search_vectors(query_embeddings, n_children, normalized)
+        all_results = []
+        for row_distances, row_indices in zip(distances, indices):
+            valid = row_indices >= 0
+            parent_rows = self.parent_ids[row_indices[valid]]
+            results = []
+            seen = set()
+            # Hits are best-first, so a parent's first hit is its best score
+            for dist, parent_id in zip(row_distances[valid], parent_rows):
+                if parent_id in seen:
+                    continue
+                seen.add(parent_id)
+                parent = self.parents[parent_id].copy()
+                parent["score"] = float(1 - dist / 2)
+                results.append(parent)
+                if len(results) == top_k:
+                    break
+            all_results.append(results)
+        return all_results
+
+    def _search_vectors(
+        self,
+        query_embeddings: np.ndarray,
+        k: int,
+        normalized: bool
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if normalized:
+            # Only converts if dtype/layout is wrong - otherwise no copy
+            query_vectors = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        else:
+            # normalize_L2 works in place, so never touch the caller's array
+            query_vectors = np.array(query_embeddings, dtype=np.float32)
+            faiss.normalize_L2(query_vectors)
+        return self.index.search(query_vectors, k)
 
     def total_chunks(self) -> int:
         return self.index.ntotal
 
+    def index_bytes(self) -> int:
+        """Size of the serialized FAISS index, i.e. its on-disk footprint."""
+        return int(faiss.serialize_index(self.index).nbytes)
+
+    def memory_bytes(self) -> int:
+        """
+        Rough estimate of the RAM this store holds: the raw float32
+        vectors plus the chunk text. Used to budget resident collections.
+        """
+        vector_bytes = self.index.ntotal * self.embedding_dim * 4
+        text_bytes = sum(len(c.get("text", "")) for c in self.chunks)
+        parent_bytes = sum(len(p["text"]) for p in self.parents) + self.parent_ids.nbytes
+        return vector_bytes + text_bytes + parent_bytes
+
     def save(self, directory: str | Path) -> None:
         """
         Save FAISS index and chunk metadata to disk.
@@ -57,6 +217,9 @@ class FAISSVectorStore:
                       Creates two files:
                       - faiss.index  (binary FAISS index)
                       - chunks.json  (chunk metadata)
+                      plus, in parent-document mode:
+                      - parents.json    (parent sections)
+                      - parent_ids.npy  (int32 child -> parent map)
         """
         directory = Path(directory)
         directory.mkdir(parents=True, exist_ok=True)
@@ -69,14 +232,28 @@ class FAISSVectorStore:
         with open(chunks_path, "w") as f:
             json.dump(self.chunks, f)
 
+        parents_path = directory / "parents.json"
+        parent_ids_path = directory / "parent_ids.npy"
+        if self.has_parents():
+            with open(parents_path, "w") as f:
+                json.dump(self.parents, f)
+            np.save(parent_ids_path, self.parent_ids)
+        else:
+            parents_path.unlink(missing_ok=True)
+            parent_ids_path.unlink(missing_ok=True)
+
         logger.info(f"Saved index ({self.index.ntotal} vectors) to {directory}")
 
-    def load(self, directory: str | Path) -> bool:
+    def load(self, directory: str | Path, mmap: bool = False) -> bool:
         """
         Load FAISS index and chunk metadata from disk.
 
         Args:
             directory: Folder containing faiss.index and chunks.json
+            mmap: Memory-map the index file instead of reading it into RAM.
+                  IO_FLAG_MMAP_IFC maps Flat codes in place, IO_FLAG_MMAP
+                  maps IVF inverted lists. Falls back to a normal read if
+                  the index type can't be mapped.
 
         Returns:
             True if loaded successfully, False if files don't exist
@@ -89,10 +266,29 @@ class FAISSVectorStore:
             logger.info("No saved index found — starting fresh")
             return False
 
-        self.index = faiss.read_index(str(index_path))
+        if mmap:
+            try:
+                self.index = faiss.read_index(
+                    str(index_path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_MMAP_IFC
+                )
+            except RuntimeError as e:
+                logger.warning(f"Could not mmap {index_path} ({e}) — reading into memory")
+                self.index = faiss.read_index(str(index_path))
+        else:
+            self.index = faiss.read_index(str(index_path))
+        self.embedding_dim = self.index.d
 
         with open(chunks_path, "r") as f:
             self.chunks = json.load(f)
 
+        parents_path = directory / "parents.json"
+        if parents_path.exists():
+            with open(parents_path, "r") as f:
+                self.parents = json.load(f)
+            self.parent_ids = np.load(directory / "parent_ids.npy", mmap_mode="r" if mmap else None)
+        else:
+            self.parents = []
+            self.parent_ids = np.empty(0, dtype=np.int32)
+
         logger.info(f"Loaded index ({self.index.ntotal} vectors) from {directory}")
         return True
\ No newline at end of file
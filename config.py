@@ -1,9 +1,62 @@
 # config.py
 import os
 from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()  # loads .env file into environment variables before reading settings
 
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data" / "raw"
 INDEX_DIR = BASE_DIR / "data" / "index"
 
+# Collections - each one gets its own subfolder under DATA_DIR and INDEX_DIR
+DEFAULT_COLLECTION = os.getenv("DEFAULT_COLLECTION", "default")
+# How much RAM resident collection indexes may use before cold ones are evicted
+COLLECTION_MEMORY_BUDGET_MB = int(os.getenv("COLLECTION_MEMORY_BUDGET_MB", "1024"))
+
+# Parent-document retrieval: search small chunks, answer from parent sections
+# of this many characters. 0 keeps the flat single-level index.
+PARENT_CHUNK_SIZE = int(os.getenv("PARENT_CHUNK_SIZE", "0"))
+
+# Uploads are streamed to disk in chunks of this size
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+
+# Number of query embeddings kept in the exact-match LRU cache (0 disables it)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+
+# LLM backend: "groq" (needs GROQ_API_KEY) or "stub" (local, deterministic - for CI)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# Send a hedged request after this many seconds. Unset = use the observed p95
+LLM_HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S")) if os.getenv("LLM_HEDGE_AFTER_S") else None
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+
+# OCR fallback for pages with no extractable text (scanned pages). Needs Tesseract.
+OCR_ENABLED = os.getenv("OCR_ENABLED", "false").lower() in ("1", "true", "yes")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "eng")
+# Max seconds spent on OCR per document - pages not done by then are skipped
+OCR_DOC_BUDGET_S = float(os.getenv("OCR_DOC_BUDGET_S", "120"))
+# Outside INDEX_DIR, so it can't clash with a collection's snapshot folder
+OCR_CACHE_DIR = BASE_DIR / "data" / "ocr_cache"
+
+# Ingestion jobs - SQLite job table plus checkpointed embedding batches
+JOBS_DIR = BASE_DIR / "data" / "jobs"
+JOBS_DB_PATH = JOBS_DIR / "jobs.sqlite3"
+# Chunks embedded (and checkpointed) per batch
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+
+# Query admission control - concurrent queries per stage, and how many may
+# wait for a stage before new ones get 429. Queries degrade as the queue fills.
+QUERY_MAX_RETRIEVALS = int(os.getenv("QUERY_MAX_RETRIEVALS", "8"))
+QUERY_MAX_GENERATIONS = int(os.getenv("QUERY_MAX_GENERATIONS", "16"))
+QUERY_MAX_QUEUE = int(os.getenv("QUERY_MAX_QUEUE", "64"))
+QUERY_RETRY_AFTER_S = int(os.getenv("QUERY_RETRY_AFTER_S", "2"))
+# top_k cap for degraded queries, and answers kept for serving under overload
+QUERY_DEGRADED_TOP_K = int(os.getenv("QUERY_DEGRADED_TOP_K", "2"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
\ No newline at end of file
@@ -1,8 +1,11 @@
 # main.py
 
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.api.routes import router
+from app.api.routes import router, job_runner
+from app.llm.generator import close_backend
+from app.ingestion.ocr import shutdown_page_ocr
 from config import LOG_LEVEL
 
 logging.basicConfig(
@@ -10,10 +13,23 @@ logging.basicConfig(
     format="%(asctime)s | %(levelname)s | %(name)s | %(message)s"
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Resume interrupted ingestion jobs and start processing the queue
+    job_runner.start()
+    yield
+    job_runner.stop()
+    # Close pooled LLM connections and OCR workers on shutdown
+    await close_backend()
+    shutdown_page_ocr()
+
+
 app = FastAPI(
     title="RAG System API",
     description="Retrieval-Augmented Generation over PDF documents",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.include_router(router, prefix="/api/v1")
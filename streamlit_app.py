@@ -15,10 +15,47 @@ st.set_page_config(
 st.title("📚 RAG System")
 st.caption("Upload PDFs and ask questions — answers grounded in your documents.")
 
+
+@st.fragment(run_every="1s")
+def ingest_job_status():
+    """Poll the running ingestion job - only this fragment reruns, not the page."""
+    job_id = st.session_state.get("ingest_job_id")
+    if not job_id:
+        return
+    try:
+        job = requests.get(f"{API_BASE}/jobs/{job_id}").json()
+    except Exception as e:
+        st.error(f"Could not connect to API: {e}")
+        return
+
+    done = sum(1 for d in job["documents"] if d["status"] in ("indexed", "failed"))
+    st.progress(
+        job["progress"],
+        text=f"{job['status'].capitalize()} — {done}/{len(job['documents'])} document(s)"
+    )
+
+    if job["status"] in ("queued", "running"):
+        if st.button("✋ Cancel ingestion", use_container_width=True):
+            requests.post(f"{API_BASE}/jobs/{job_id}/cancel")
+        return
+
+    # Finished - report once, then refresh the whole page (health, index state)
+    st.session_state.ingest_job_id = None
+    if job["status"] == "completed":
+        st.session_state.ingest_result = ("success", f"✅ Ingested {done} file(s)")
+    elif job["status"] == "cancelled":
+        st.session_state.ingest_result = ("warning", "Ingestion cancelled.")
+    else:
+        st.session_state.ingest_result = ("error", f"Ingestion failed: {job['error']}")
+    st.rerun()
+
+
 # ── Sidebar ──────────────────────────────────────────────────────────
 with st.sidebar:
     st.header("📂 Document Management")
 
+    collection = st.text_input("Collection", value="default")
+
     uploaded_files = st.file_uploader(
         "Upload PDF(s)",
         type=["pdf"],
@@ -29,28 +66,40 @@ with st.sidebar:
         if not uploaded_files:
             st.warning("Please upload at least one PDF first.")
         else:
-            with st.spinner("Ingesting documents..."):
-                files = [
-                    ("files", (f.name, f.getvalue(), "application/pdf"))
-                    for f in uploaded_files
-                ]
-                try:
-                    resp = requests.post(f"{API_BASE}/ingest", files=files)
-                    data = resp.json()
-                    if resp.status_code == 200:
-                        st.success(f"✅ Ingested {data['total_files_in_index']} file(s)")
-                        st.info(f"📊 {data['total_chunks']} chunks indexed")
-                        st.session_state.index_built = True
-                    else:
-                        st.error(f"Error: {data}")
-                except Exception as e:
-                    st.error(f"Could not connect to API: {e}")
+            files = [
+                ("files", (f.name, f.getvalue(), "application/pdf"))
+                for f in uploaded_files
+            ]
+            try:
+                resp = requests.post(
+                    f"{API_BASE}/ingest",
+                    files=files,
+                    data={"collection": collection}
+                )
+                data = resp.json()
+                if resp.status_code == 202:
+                    if data["skipped_duplicates"]:
+                        st.info(f"Already ingested: {', '.join(data['skipped_duplicates'])}")
+                    st.session_state.ingest_job_id = data["job_id"]
+                else:
+                    st.error(f"Error: {data}")
+            except Exception as e:
+                st.error(f"Could not connect to API: {e}")
+
+    ingest_job_status()
+
+    if "ingest_result" in st.session_state:
+        level, message = st.session_state.pop("ingest_result")
+        getattr(st, level)(message)
 
     st.divider()
 
     if st.button("🗑️ Reset Index", use_container_width=True):
         try:
-            requests.delete(f"{API_BASE}/ingest/reset")
+            requests.delete(
+                f"{API_BASE}/ingest/reset",
+                params={"collection": collection}
+            )
             st.session_state.index_built = False
             st.session_state.chat_history = []
             st.success("Index reset.")
@@ -59,7 +108,11 @@ with st.sidebar:
 
     # Health status
     try:
-        health = requests.get(f"{API_BASE}/health").json()
+        health = requests.get(
+            f"{API_BASE}/health",
+            params={"collection": collection}
+        ).json()
+        st.session_state.index_built = health.get("index_built", False)
         if health.get("index_built"):
             st.success(f"✅ Index active — {health['total_chunks']} chunks")
         else:
@@ -99,13 +152,17 @@ if prompt := st.chat_input("Ask a question about your documents..."):
                 try:
                     resp = requests.post(
                         f"{API_BASE}/query",
-                        json={"question": prompt, "top_k": 3}
+                        json={"question": prompt, "top_k": 3, "collection": collection}
                     )
                     data = resp.json()
 
                     if resp.status_code == 200:
-                        answer = data["answer"]
                         sources = data["sources"]
+                        answer = data["answer"]
+                        if answer is None:
+                            # Server was overloaded - it sent the passages without an LLM answer
+                            answer = "The server is busy, so here are the most relevant passages:\n\n" + \
+                                "\n\n".join(f"> {s['text']}" for s in sources)
                         st.write(answer)
                         with st.expander("📎 Sources"):
                             for s in sources:
@@ -116,6 +173,8 @@ if prompt := st.chat_input("Ask a question about your documents..."):
                             "content": answer,
                             "sources": sources
                         })
+                    elif resp.status_code == 429:
+                        st.warning(f"The server is busy - try again in {resp.headers.get('Retry-After', 'a few')} seconds.")
                     else:
                         st.error(f"Error: {data}")
 
@@ -0,0 +1,104 @@
+# tests/test_admission.py
+
+import asyncio
+import pytest
+from app.api.admission import (
+    AdmissionController, AnswerCache, Overloaded,
+    NORMAL, REDUCE_TOP_K, CACHE_OR_RETRIEVAL
+)
+
+
+async def hold(controller, stage, release):
+    # Admit one request and keep it in `stage` until release is set
+    async with controller.admit():
+        async with controller.stage(stage):
+            await release.wait()
+
+
+async def wait_queued(controller, depth):
+    for _ in range(100):
+        if controller.queue_depth() == depth:
+            return
+        await asyncio.sleep(0)
+    raise AssertionError(f"queue depth stayed at {controller.queue_depth()}")
+
+
+def test_stage_limit_queues_requests():
+    """Requests beyond a stage's limit wait and count towards queue depth."""
+    async def scenario():
+        controller = AdmissionController({"retrieval": 1}, max_queue=10)
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold(controller, "retrieval", release)) for _ in range(3)]
+        await wait_queued(controller, 2)
+        assert controller.metrics()["stage_running"] == {"retrieval": 1}
+        assert controller.metrics()["in_flight"] == 3
+        release.set()
+        await asyncio.gather(*tasks)
+        assert controller.queue_depth() == 0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_with_retry_after():
+    """Once max_queue requests are waiting, new ones are rejected."""
+    async def scenario():
+        controller = AdmissionController({"retrieval": 1}, max_queue=2, retry_after_s=5)
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold(controller, "retrieval", release)) for _ in range(3)]
+        await wait_queued(controller, 2)
+
+        with pytest.raises(Overloaded) as e:
+            async with controller.admit():
+                pass
+        assert e.value.retry_after_s == 5
+        assert controller.metrics()["rejected_total"] == 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+
+def test_degradation_level_rises_with_queue_depth():
+    """An empty queue runs normally; a nearly full one degrades fully."""
+    async def scenario():
+        controller = AdmissionController({"generation": 1}, max_queue=8)
+        async with controller.admit() as level:
+            assert level == NORMAL
+
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold(controller, "generation", release)) for _ in range(4)]
+        await wait_queued(controller, 3)
+        async with controller.admit() as level:
+            assert level == REDUCE_TOP_K
+
+        more = [asyncio.create_task(hold(controller, "generation", release)) for _ in range(4)]
+        await wait_queued(controller, 7)
+        async with controller.admit() as level:
+            assert level == CACHE_OR_RETRIEVAL
+
+        release.set()
+        await asyncio.gather(*tasks, *more)
+
+    asyncio.run(scenario())
+
+
+def test_prometheus_metrics_expose_queue_depth():
+    """The text exposition includes queue depth and per-stage gauges."""
+    controller = AdmissionController({"retrieval": 2, "generation": 4}, max_queue=16)
+    text = controller.prometheus_metrics()
+    assert "rag_query_queue_depth 0" in text
+    assert "rag_query_queue_limit 16" in text
+    assert 'rag_query_stage_running{stage="generation"} 0' in text
+
+
+def test_answer_cache_evicts_least_recently_used():
+    """The cache keeps max_size answers, dropping the least recently used."""
+    cache = AnswerCache(max_size=2)
+    cache.put(("a",), {"answer": "1"})
+    cache.put(("b",), {"answer": "2"})
+    cache.get(("a",))
+    cache.put(("c",), {"answer": "3"})
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == {"answer": "1"}
+    assert len(cache) == 2
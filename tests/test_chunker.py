@@ -1,7 +1,7 @@
 # tests/test_chunker.py
 
 import pytest
-from app.ingestion.chunker import chunk_text
+from app.ingestion.chunker import chunk_text, chunk_hierarchical
 
 
 # Sample pages mimicking load_pdf() output
@@ -50,4 +50,24 @@ def test_invalid_overlap_raises():
 def test_empty_pages_returns_empty():
     """Empty input returns empty list."""
     chunks = chunk_text([], chunk_size=500, overlap=50)
-    assert chunks == []
\ No newline at end of file
+    assert chunks == []
+
+
+def test_hierarchical_children_map_to_parents():
+    """Every child is a substring of the parent section it points to."""
+    pages = [{"page": 1, "text": "ABCDEFGHIJ" * 50, "source": "test.pdf"}]
+    parents, children = chunk_hierarchical(pages, parent_size=200, child_size=50, overlap=10)
+
+    assert len(parents) == 3  # 500 chars -> 200 + 200 + 100
+    assert [p["parent_id"] for p in parents] == [0, 1, 2]
+    for child in children:
+        parent = parents[child["parent_id"]]
+        assert child["text"] in parent["text"]
+        assert child["page"] == parent["page"] == 1
+    assert [c["chunk_id"] for c in children] == list(range(len(children)))
+
+
+def test_hierarchical_parent_smaller_than_child_raises():
+    """parent_size < child_size should raise ValueError."""
+    with pytest.raises(ValueError):
+        chunk_hierarchical(SAMPLE_PAGES, parent_size=100, child_size=500)
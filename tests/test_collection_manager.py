@@ -0,0 +1,134 @@
+# tests/test_collection_manager.py
+
+import threading
+from functools import partial
+import pytest
+import numpy as np
+from app.vectorstore.faiss_store import FAISSVectorStore
+from app.retrieval.collection_manager import (
+    CollectionManager, migrate_legacy_layout, validate_collection_name
+)
+from app.retrieval.retriever import Retriever
+
+
+def save_snapshot(directory, n=5, dim=384):
+    """Helper: write a store with n random vectors to directory."""
+    store = FAISSVectorStore(embedding_dim=dim)
+    chunks = [
+        {"chunk_id": i, "text": f"chunk {i}", "source": "test.pdf", "page": 1}
+        for i in range(n)
+    ]
+    store.add_chunks(chunks, np.random.rand(n, dim).astype("float32"))
+    store.save(directory)
+    return store.memory_bytes()
+
+
+def test_unknown_collection_returns_none(tmp_path):
+    """A collection with no snapshot is not built."""
+    manager = CollectionManager(tmp_path, memory_budget_bytes=10**9)
+    assert manager.get("missing") is None
+
+
+def test_lazy_load_from_snapshot(tmp_path):
+    """Collections are loaded from their snapshot on first access."""
+    save_snapshot(tmp_path / "team-a")
+    manager = CollectionManager(tmp_path, memory_budget_bytes=10**9)
+    assert manager.resident_collections() == []
+
+    retriever = manager.get("team-a")
+    assert retriever.is_built
+    assert retriever.store.total_chunks() == 5
+    assert manager.resident_collections() == ["team-a"]
+
+
+def test_lru_eviction_under_budget(tmp_path):
+    """Least recently used collection is evicted when over budget."""
+    size = save_snapshot(tmp_path / "a")
+    save_snapshot(tmp_path / "b")
+    save_snapshot(tmp_path / "c")
+    manager = CollectionManager(tmp_path, memory_budget_bytes=2 * size)
+
+    manager.get("a")
+    manager.get("b")
+    manager.get("a")  # a is now hotter than b
+    manager.get("c")
+
+    assert manager.resident_collections() == ["a", "c"]
+    assert manager.list_collections() == ["a", "b", "c"]
+    # Evicted collections reload transparently
+    assert manager.get("b").store.total_chunks() == 5
+
+
+def test_drop_removes_snapshot(tmp_path):
+    """drop() forgets the collection in memory and on disk."""
+    save_snapshot(tmp_path / "a")
+    manager = CollectionManager(tmp_path, memory_budget_bytes=10**9)
+    manager.get("a")
+    manager.drop("a")
+    assert manager.get("a") is None
+    assert manager.list_collections() == []
+
+
+def test_cold_load_does_not_block_other_collections(tmp_path):
+    """A slow snapshot load only holds its own collection's lock."""
+    save_snapshot(tmp_path / "hot")
+    manager = CollectionManager(tmp_path, memory_budget_bytes=10**9)
+    manager.get("hot")
+
+    loading = threading.Event()
+    release = threading.Event()
+
+    class SlowRetriever:
+        def load(self, directory, mmap=False):
+            loading.set()
+            release.wait(5)
+            return False
+
+    manager.retriever_factory = SlowRetriever
+    cold = threading.Thread(target=manager.get, args=("cold",))
+    cold.start()
+    assert loading.wait(5)
+
+    hot = []
+    reader = threading.Thread(target=lambda: hot.append(manager.get("hot")))
+    reader.start()
+    reader.join(2)
+    release.set()
+    cold.join()
+    assert hot and hot[0].store.total_chunks() == 5
+
+
+def test_granularity_mismatch_rejected(tmp_path):
+    """A flat collection can't take parent-document chunks, and says how to fix it."""
+    save_snapshot(tmp_path / "flat")
+    manager = CollectionManager(
+        tmp_path,
+        memory_budget_bytes=10**9,
+        retriever_factory=partial(Retriever, parent_size=2000)
+    )
+    manager.check_granularity("new")  # no snapshot yet - anything goes
+    with pytest.raises(ValueError, match="Reset the collection"):
+        manager.check_granularity("flat")
+
+
+@pytest.mark.parametrize("name", ["", "../etc", "a/b", "x" * 65])
+def test_invalid_collection_names_rejected(name):
+    """Names that aren't safe folder names raise ValueError."""
+    with pytest.raises(ValueError):
+        validate_collection_name(name)
+
+
+def test_legacy_snapshot_moves_into_default_collection(tmp_path):
+    """A pre-collections snapshot and its PDFs become the default collection."""
+    index_root, data_root = tmp_path / "index", tmp_path / "raw"
+    save_snapshot(index_root)
+    data_root.mkdir()
+    (data_root / "old.pdf").write_bytes(b"%PDF")
+
+    assert migrate_legacy_layout(index_root, data_root, "default")
+    assert not (index_root / "faiss.index").exists()
+    assert (data_root / "default" / "old.pdf").exists()
+    manager = CollectionManager(index_root, memory_budget_bytes=10**9)
+    assert manager.list_collections() == ["default"]
+    assert manager.get("default").store.total_chunks() == 5
+    assert not migrate_legacy_layout(index_root, data_root, "default")
@@ -0,0 +1,68 @@
+# tests/test_embedder.py
+
+import numpy as np
+import pytest
+from app.embeddings import embedder
+
+
+class CountingModel:
+    """Stand-in for SentenceTransformer that counts encode() calls."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+        self.calls = 0
+
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        self.calls += 1
+        vectors = np.random.rand(len(texts), self.dim)
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    model = CountingModel()
+    monkeypatch.setattr(embedder, "model", model)
+    embedder.clear_query_cache()
+    yield model
+    embedder.clear_query_cache()
+
+
+def test_repeated_query_hits_cache(fake_model):
+    """Same query only runs the model once."""
+    first = embedder.embed_query("What is the CGPA?")
+    second = embedder.embed_query("What is the CGPA?")
+    assert fake_model.calls == 1
+    assert second is first
+    assert embedder.query_cache_info()["hits"] == 1
+
+
+def test_whitespace_variants_share_entry(fake_model):
+    """Queries differing only in whitespace map to the same cache key."""
+    embedder.embed_query("  what   is\tthis ")
+    embedder.embed_query("what is this")
+    assert fake_model.calls == 1
+
+
+def test_query_vector_contract(fake_model):
+    """Returned vectors are float32, C-contiguous and unit length."""
+    vector = embedder.embed_query("test query")
+    assert vector.shape == (1, 384)
+    assert vector.dtype == np.float32
+    assert vector.flags.c_contiguous
+    assert np.isclose(np.linalg.norm(vector), 1.0, atol=1e-5)
+
+
+def test_cache_evicts_least_recently_used(fake_model, monkeypatch):
+    """Cache never grows past QUERY_CACHE_SIZE."""
+    monkeypatch.setattr(embedder, "QUERY_CACHE_SIZE", 2)
+    embedder.embed_query("a")
+    embedder.embed_query("b")
+    embedder.embed_query("a")
+    embedder.embed_query("c")  # evicts "b"
+    assert embedder.query_cache_info()["size"] == 2
+    embedder.embed_query("a")
+    assert fake_model.calls == 3
+    embedder.embed_query("b")
+    assert fake_model.calls == 4
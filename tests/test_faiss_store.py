@@ -1,5 +1,6 @@
 # tests/test_faiss_store.py
 
+from pathlib import Path
 import pytest
 import numpy as np
 from app.vectorstore.faiss_store import FAISSVectorStore
@@ -55,4 +56,120 @@ def test_mismatched_chunks_embeddings_raises():
     chunks = [{"chunk_id": 0, "text": "test", "source": "test.pdf", "page": 1}]
     embeddings = np.random.rand(3, 384).astype("float32")
     with pytest.raises(ValueError):
-        store.add_chunks(chunks, embeddings)
\ No newline at end of file
+        store.add_chunks(chunks, embeddings)
+
+
+def test_search_many_matches_single_searches():
+    """Batched search returns the same hits as one search per query."""
+    store = make_store_with_data(n=20)
+    queries = np.random.rand(4, 384).astype("float32")
+    batched = store.search_many(queries, top_k=3)
+    assert len(batched) == 4
+    for query, results in zip(queries, batched):
+        single = store.search(query[None, :], top_k=3)
+        assert [r["chunk_id"] for r in results] == [r["chunk_id"] for r in single]
+
+
+def test_ivf_index_trained_on_first_add():
+    """Non-Flat index types are trained on the first batch added, then searchable."""
+    store = FAISSVectorStore(embedding_dim=16, index_type="IVF4,Flat")
+    assert not store.index.is_trained
+
+    chunks = [{"chunk_id": i, "text": f"chunk {i}", "source": "test.pdf", "page": 1} for i in range(200)]
+    embeddings = np.random.rand(200, 16).astype("float32")
+    store.add_chunks(chunks, embeddings)
+
+    assert store.index.is_trained
+    assert store.total_chunks() == 200
+    assert store.search(embeddings[7:8], top_k=1)[0]["chunk_id"] == 7
+
+
+def test_normalized_fast_path_matches_default():
+    """Pre-normalized float32 queries give the same results without re-normalizing."""
+    store = make_store_with_data(n=10)
+    query = np.random.rand(1, 384).astype("float32")
+    unit = query / np.linalg.norm(query)
+
+    default = store.search(query, top_k=3)
+    fast = store.search(unit, top_k=3, normalized=True)
+    assert [r["chunk_id"] for r in fast] == [r["chunk_id"] for r in default]
+
+
+def test_search_does_not_modify_query():
+    """Default path normalizes a copy, not the caller's array."""
+    store = make_store_with_data(n=5)
+    query = np.random.rand(1, 384).astype("float32") * 10
+    original = query.copy()
+    store.search(query, top_k=2)
+    assert np.array_equal(query, original)
+
+
+def make_parent_store(dim=384):
+    """Helper: 2 parents with 3 children each."""
+    store = FAISSVectorStore(embedding_dim=dim)
+    parents = [
+        {"parent_id": i, "text": f"parent {i}", "source": "test.pdf", "page": i + 1}
+        for i in range(2)
+    ]
+    chunks = [
+        {"chunk_id": i, "text": f"child {i}", "source": "test.pdf", "page": i // 3 + 1, "parent_id": i // 3}
+        for i in range(6)
+    ]
+    embeddings = np.random.rand(6, dim).astype("float32")
+    store.add_chunks(chunks, embeddings, parents=parents)
+    return store, embeddings
+
+
+def test_parent_search_returns_distinct_parents():
+    """Child hits are mapped back to deduplicated parent sections."""
+    store, embeddings = make_parent_store()
+    results = store.search(embeddings[4:5], top_k=3, expand_parents=True)
+    assert results[0]["parent_id"] == 1
+    assert len(results) == len({r["parent_id"] for r in results}) == 2
+    assert results[0]["text"] == "parent 1"
+
+
+def test_parent_ids_are_rebased_across_adds():
+    """Parents from a second add don't collide with the first."""
+    store, embeddings = make_parent_store()
+    parents = [{"parent_id": 0, "text": "parent new", "source": "b.pdf", "page": 1}]
+    chunks = [{"chunk_id": 0, "text": "child new", "source": "b.pdf", "page": 1, "parent_id": 0}]
+    store.add_chunks(chunks, embeddings[:1] * -1, parents=parents)
+
+    assert store.parent_ids.dtype == np.int32
+    assert store.parent_ids.tolist() == [0, 0, 0, 1, 1, 1, 2]
+    assert store.parents[2]["text"] == "parent new"
+    assert store.chunks[6]["parent_id"] == 2
+    assert chunks[0]["parent_id"] == 0  # the caller's dicts aren't changed
+
+
+def test_parent_store_save_and_load(tmp_path):
+    """Parents and the child -> parent map survive a save/load."""
+    store, embeddings = make_parent_store()
+    store.save(tmp_path)
+    loaded = FAISSVectorStore()
+    assert loaded.load(tmp_path)
+    assert loaded.has_parents()
+    assert loaded.parent_ids.tolist() == store.parent_ids.tolist()
+    assert loaded.search(embeddings[0:1], top_k=1, expand_parents=True)[0]["parent_id"] == 0
+
+
+@pytest.mark.skipif(not Path("/proc/self/maps").exists(), reason="needs /proc/self/maps")
+def test_flat_index_load_is_memory_mapped(tmp_path):
+    """Loading a Flat snapshot with mmap=True maps the index file instead of copying it."""
+    make_store_with_data(n=50).save(tmp_path)
+    store = FAISSVectorStore(embedding_dim=384)
+    store.load(tmp_path, mmap=True)
+    assert str(tmp_path / "faiss.index") in Path("/proc/self/maps").read_text()
+    assert len(store.search(np.random.rand(1, 384).astype("float32"), top_k=3)) == 3
+
+
+def test_mixing_flat_and_parent_chunks_raises():
+    """A flat store can't take parent-document chunks."""
+    store = make_store_with_data(n=3)
+    with pytest.raises(ValueError):
+        store.add_chunks(
+            [{"chunk_id": 0, "text": "x", "source": "t.pdf", "page": 1, "parent_id": 0}],
+            np.random.rand(1, 384).astype("float32"),
+            parents=[{"parent_id": 0, "text": "p", "source": "t.pdf", "page": 1}]
+        )
@@ -0,0 +1,96 @@
+# tests/test_harness.py
+
+import json
+import numpy as np
+import pytest
+from app.evaluation import harness
+from app.evaluation.harness import load_golden_set, build_grid, evaluate_config, select_fastest
+from app.retrieval import retriever as retriever_module
+
+DIM = 26
+PAGES = [
+    {"page": 1, "text": "apples and apricots", "source": "fruit.pdf"},
+    {"page": 2, "text": "zebras and zebus", "source": "fruit.pdf"},
+]
+GOLDEN = [
+    {"query": "apple", "relevant": {("fruit.pdf", 1)}},
+    {"query": "zebra", "relevant": {("fruit.pdf", 2)}},
+]
+CONFIG = {"chunk_size": 100, "overlap": 0, "parent_size": 0, "index_type": "Flat", "model_name": "fake"}
+
+
+def letter_counts(texts):
+    """Fake embedding: how often each letter a-z occurs."""
+    vectors = np.zeros((len(texts), DIM), dtype="float32")
+    for row, text in enumerate(texts):
+        for ch in text.lower():
+            if "a" <= ch <= "z":
+                vectors[row, ord(ch) - ord("a")] += 1
+    return vectors
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """Replace the sentence-transformer with letter counts."""
+    def embed_queries(queries, model_name=None):
+        vectors = letter_counts(queries)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    monkeypatch.setattr(retriever_module, "embed_texts", lambda texts, model_name=None: letter_counts(texts))
+    monkeypatch.setattr(retriever_module, "embed_queries", embed_queries)
+    monkeypatch.setattr(harness, "embedding_dim", lambda model_name: DIM)
+
+
+def test_load_golden_set(tmp_path):
+    """Each line becomes a query with a set of (source, page) pairs; blank lines are skipped."""
+    path = tmp_path / "golden.jsonl"
+    path.write_text(
+        json.dumps({"query": "apple", "relevant": [{"source": "fruit.pdf", "page": "1"}]}) + "\n\n"
+    )
+    assert load_golden_set(path) == [{"query": "apple", "relevant": {("fruit.pdf", 1)}}]
+
+
+def test_load_golden_set_rejects_unlabeled_query(tmp_path):
+    """A query without relevant pages is an error, reported with its line number."""
+    path = tmp_path / "golden.jsonl"
+    path.write_text(json.dumps({"query": "apple", "relevant": []}) + "\n")
+    with pytest.raises(ValueError, match=":1:"):
+        load_golden_set(path)
+
+
+def test_build_grid_skips_invalid_combinations():
+    """Overlaps not below the chunk size and parents smaller than chunks are left out."""
+    grid = build_grid([100, 300], [0, 200], ["Flat"], ["fake"], parent_sizes=[0, 200])
+    assert {(c["chunk_size"], c["overlap"], c["parent_size"]) for c in grid} == {
+        (100, 0, 0), (100, 0, 200), (300, 0, 0), (300, 200, 0)
+    }
+
+
+def test_evaluate_config_scores_retrieval(fake_model):
+    """A config that ranks the relevant page first gets perfect scores."""
+    result = evaluate_config(CONFIG, PAGES, GOLDEN, k_values=[1, 2])
+    assert result["num_chunks"] == 2
+    assert result["mrr"] == 1.0
+    assert result["recall@1"] == 1.0
+    assert result["ndcg@2"] == 1.0
+    assert result["context_chars"] > 0
+    assert result["query_latency_ms"] >= 0
+
+
+def test_evaluate_config_reports_build_errors(fake_model):
+    """An index that can't be trained on the corpus is reported, not raised."""
+    result = evaluate_config({**CONFIG, "index_type": "IVF64,Flat"}, PAGES, GOLDEN, k_values=[1])
+    assert "error" in result
+    assert "mrr" not in result
+
+
+def test_select_fastest_meets_quality_bar():
+    """The fastest config above the bar wins; failed configs are ignored."""
+    results = [
+        {"recall@5": 0.9, "query_latency_ms": 5.0},
+        {"recall@5": 0.8, "query_latency_ms": 2.0},
+        {"recall@5": 0.5, "query_latency_ms": 1.0},
+        {"error": "boom", "query_latency_ms": 0.1},
+    ]
+    assert select_fastest(results, "recall@5", 0.8) == results[1]
+    assert select_fastest(results, "recall@5", 0.95) is None
@@ -0,0 +1,321 @@
+# tests/test_job_runner.py
+
+import hashlib
+import shutil
+import threading
+import time
+from functools import partial
+from pathlib import Path
+import numpy as np
+import pytest
+from app.jobs import runner as runner_module
+from app.jobs.runner import JobRunner
+from app.jobs.store import JobStore
+from app.ingestion.uploads import load_manifest, save_manifest
+from app.retrieval.collection_manager import CollectionManager
+from app.retrieval.retriever import Retriever
+
+DIM = 8
+TEXT = "x" * 100  # 5 chunks of 20 chars -> 3 batches of 2
+
+
+def fake_load_pdf(path):
+    """load_pdf stand-in: the "PDF" is plain text on a single page."""
+    text = Path(path).read_text()
+    if text == "broken":
+        raise ValueError("not a PDF")
+    return [{"page": 1, "text": text, "source": Path(path).name}]
+
+
+@pytest.fixture
+def embed_calls(monkeypatch):
+    """Replace PDF parsing and the embedding model; records batch sizes embedded."""
+    calls = []
+
+    def fake_embed_texts(texts, model_name=None):
+        calls.append(len(texts))
+        return np.random.rand(len(texts), DIM).astype("float32")
+
+    monkeypatch.setattr(runner_module, "embed_texts", fake_embed_texts)
+    monkeypatch.setattr(runner_module, "load_pdf", fake_load_pdf)
+    return calls
+
+
+class Crash(BaseException):
+    """Stands in for the process dying - not caught by the runner's error handling."""
+
+
+def make_runner(root):
+    """Helper: a runner over root/ - a second one on the same root is a restarted worker."""
+    collections = CollectionManager(
+        root / "index",
+        memory_budget_bytes=10**9,
+        retriever_factory=partial(Retriever, chunk_size=20, overlap=0, embedding_dim=DIM)
+    )
+    return JobRunner(
+        store=JobStore(root / "jobs.sqlite3"),
+        collections=collections,
+        data_root=root / "raw",
+        checkpoint_root=root / "checkpoints",
+        batch_size=2
+    )
+
+
+@pytest.fixture
+def runner(tmp_path, embed_calls):
+    return make_runner(tmp_path)
+
+
+def restart(root):
+    """Helper: a fresh worker that requeues and claims the interrupted job."""
+    restarted = make_runner(root)
+    restarted.store.requeue_interrupted()
+    return restarted, restarted.store.claim_next()
+
+
+def queue_job(runner, collection, files):
+    """Helper: store files in the collection's upload folder and queue a job for them."""
+    data_dir = runner.data_root / collection
+    data_dir.mkdir(parents=True, exist_ok=True)
+    documents = []
+    for name, text in files.items():
+        path = data_dir / name
+        path.write_text(text)
+        documents.append({
+            "filename": name,
+            "path": str(path),
+            "sha256": hashlib.sha256(text.encode()).hexdigest()
+        })
+    return runner.store.create_job(collection, documents)
+
+
+def test_job_indexes_documents(runner, embed_calls):
+    """Documents are embedded in batches, indexed and recorded in the manifest."""
+    job_id = queue_job(runner, "c", {"a.pdf": TEXT})
+    runner.store.claim_next()
+    runner.run_job(job_id)
+
+    job = runner.store.get_job(job_id)
+    assert job["status"] == "completed"
+    assert job["documents"][0]["chunks_embedded"] == 5
+    assert embed_calls == [2, 2, 1]
+    assert runner.collections.get("c").store.total_chunks() == 5
+    assert list(load_manifest(runner.data_root / "c").values()) == ["a.pdf"]
+    assert not (runner.checkpoint_root / job_id).exists()
+
+
+def test_interrupted_job_resumes_from_checkpoint(tmp_path, runner, embed_calls, monkeypatch):
+    """After a shutdown mid-document, only the batches not yet saved are embedded."""
+    job_id = queue_job(runner, "c", {"a.pdf": TEXT})
+    runner.store.claim_next()
+
+    def stop_after_second_batch(texts, model_name=None):
+        embed_calls.append(len(texts))
+        if len(embed_calls) == 2:
+            runner._stop.set()
+        return np.random.rand(len(texts), DIM).astype("float32")
+
+    monkeypatch.setattr(runner_module, "embed_texts", stop_after_second_batch)
+    runner.run_job(job_id)
+    assert runner.store.get_job(job_id)["status"] == "running"
+
+    restarted, claimed = restart(tmp_path)
+    assert claimed == job_id
+    restarted.run_job(job_id)
+
+    assert embed_calls == [2, 2, 1]
+    assert restarted.store.get_job(job_id)["status"] == "completed"
+    assert restarted.collections.get("c").store.total_chunks() == 5
+
+
+def test_crash_after_snapshot_does_not_add_twice(tmp_path, runner, monkeypatch):
+    """A document already in the saved snapshot isn't appended again on resume."""
+    job_id = queue_job(runner, "c", {"a.pdf": TEXT})
+    runner.store.claim_next()
+
+    def crash(directory, manifest):
+        raise Crash()
+
+    monkeypatch.setattr(runner_module, "save_manifest", crash)
+    with pytest.raises(Crash):
+        runner.run_job(job_id)
+    monkeypatch.setattr(runner_module, "save_manifest", save_manifest)
+
+    restarted, claimed = restart(tmp_path)
+    restarted.run_job(claimed)
+
+    assert restarted.store.get_job(job_id)["status"] == "completed"
+    assert restarted.collections.get("c").store.total_chunks() == 5
+    assert list(load_manifest(tmp_path / "raw" / "c").values()) == ["a.pdf"]
+
+
+def test_cancel_between_batches(runner, embed_calls, monkeypatch):
+    """A cancel requested mid-document stops before the next batch and discards the upload."""
+    job_id = queue_job(runner, "c", {"a.pdf": TEXT})
+    runner.store.claim_next()
+
+    def cancel_after_first_batch(texts, model_name=None):
+        embed_calls.append(len(texts))
+        runner.cancel(job_id)
+        return np.random.rand(len(texts), DIM).astype("float32")
+
+    monkeypatch.setattr(runner_module, "embed_texts", cancel_after_first_batch)
+    runner.run_job(job_id)
+
+    assert embed_calls == [2]
+    assert runner.store.get_job(job_id)["status"] == "cancelled"
+    assert not (runner.data_root / "c" / "a.pdf").exists()
+    assert not (runner.checkpoint_root / job_id).exists()
+    assert not runner.collections.exists("c")
+
+
+def test_failed_job_discards_uploads(runner, monkeypatch):
+    """A job that fails is marked failed and its unindexed uploads are removed."""
+    job_id = queue_job(runner, "c", {"a.pdf": TEXT})
+    runner.store.claim_next()
+
+    def embed_fails(texts, model_name=None):
+        raise RuntimeError("model crashed")
+
+    monkeypatch.setattr(runner_module, "embed_texts", embed_fails)
+    runner.run_job(job_id)
+
+    job = runner.store.get_job(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "model crashed"
+    assert not (runner.data_root / "c" / "a.pdf").exists()
+    assert not (runner.checkpoint_root / job_id).exists()
+
+
+def test_cancel_queued_job_discards_uploads(runner):
+    """A job cancelled before it starts removes its uploads, so they can be re-uploaded."""
+    job_id = queue_job(runner, "c", {"a.pdf": TEXT})
+    assert runner.cancel(job_id)
+    assert runner.store.get_job(job_id)["status"] == "cancelled"
+    assert not (runner.data_root / "c" / "a.pdf").exists()
+    assert runner.store.claim_next() is None
+
+
+def test_unreadable_document_removed_on_completion(runner):
+    """A document that fails to parse doesn't sink the job, and its upload is removed."""
+    job_id = queue_job(runner, "c", {"good.pdf": TEXT, "bad.pdf": "broken"})
+    runner.store.claim_next()
+    runner.run_job(job_id)
+
+    job = runner.store.get_job(job_id)
+    assert job["status"] == "completed"
+    assert [d["status"] for d in job["documents"]] == ["indexed", "failed"]
+    assert (runner.data_root / "c" / "good.pdf").exists()
+    assert not (runner.data_root / "c" / "bad.pdf").exists()
+
+
+def wait_for_status(runner, job_id, status):
+    """Helper: poll until the background worker moves the job to status."""
+    for _ in range(500):
+        if runner.store.get_job(job_id)["status"] == status:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stayed {runner.store.get_job(job_id)['status']}")
+
+
+def test_worker_survives_unexpected_errors(runner, monkeypatch):
+    """An error outside a job's own handling fails that job, and the queue keeps moving."""
+    runner.poll_interval_s = 0.01
+    remove_failed_uploads = runner._remove_failed_uploads
+    errors = [PermissionError("upload folder not writable")]
+
+    def flaky(job_id):
+        if errors:
+            raise errors.pop()
+        remove_failed_uploads(job_id)
+
+    monkeypatch.setattr(runner, "_remove_failed_uploads", flaky)
+    first = queue_job(runner, "c", {"a.pdf": TEXT})
+    second = queue_job(runner, "c", {"b.pdf": "y" * 100})
+    runner.start()
+    try:
+        wait_for_status(runner, second, "completed")
+    finally:
+        runner.stop()
+
+    job = runner.store.get_job(first)
+    assert job["status"] == "failed"
+    assert job["error"] == "upload folder not writable"
+
+
+def reset_collection(runner, name):
+    """Helper: what DELETE /ingest/reset does."""
+    for job_id in runner.store.active_job_ids(name):
+        runner.cancel(job_id)
+    with runner.collections.lock(name):
+        runner.collections.drop(name)
+        shutil.rmtree(runner.data_root / name, ignore_errors=True)
+
+
+def test_reset_waits_for_indexing_to_finish(runner):
+    """A reset during indexing can't be undone by the job writing its snapshot back."""
+    job_id = queue_job(runner, "c", {"a.pdf": TEXT})
+    runner.store.claim_next()
+
+    indexing = threading.Event()
+    release = threading.Event()
+    get_or_create = runner.collections.get_or_create
+
+    def slow_get_or_create(name):
+        indexing.set()
+        release.wait(5)
+        return get_or_create(name)
+
+    runner.collections.get_or_create = slow_get_or_create
+    job = threading.Thread(target=runner.run_job, args=(job_id,))
+    job.start()
+    assert indexing.wait(5)
+
+    reset = threading.Thread(target=reset_collection, args=(runner, "c"))
+    reset.start()
+    reset.join(0.2)
+    assert reset.is_alive()  # blocked on the collection lock
+
+    release.set()
+    job.join(5)
+    reset.join(5)
+    assert not runner.collections.exists("c")
+    assert not (runner.data_root / "c").exists()
+
+
+def test_reset_before_indexing_cancels_job(runner):
+    """A reset that lands after embedding stops the job before it indexes anything."""
+    job_id = queue_job(runner, "c", {"a.pdf": TEXT})
+    runner.store.claim_next()
+    embed_document = runner._embed_document
+
+    def embed_then_reset(*args):
+        embed_document(*args)
+        reset_collection(runner, "c")
+
+    runner._embed_document = embed_then_reset
+    runner.run_job(job_id)
+
+    assert runner.store.get_job(job_id)["status"] == "cancelled"
+    assert not runner.collections.exists("c")
+    assert not (runner.data_root / "c").exists()
+
+
+def test_granularity_mismatch_fails_before_embedding(runner, embed_calls):
+    """Turning on parent chunks for a flat collection fails the job up front, with a clear error."""
+    first = queue_job(runner, "c", {"a.pdf": TEXT})
+    runner.store.claim_next()
+    runner.run_job(first)
+
+    runner.collections.retriever_factory = partial(
+        Retriever, chunk_size=20, overlap=0, embedding_dim=DIM, parent_size=40
+    )
+    second = queue_job(runner, "c", {"b.pdf": "y" * 100})
+    runner.store.claim_next()
+    runner.run_job(second)
+
+    job = runner.store.get_job(second)
+    assert job["status"] == "failed"
+    assert "Reset the collection" in job["error"]
+    assert embed_calls == [2, 2, 1]  # only the first job embedded anything
+    assert runner.collections.get("c").store.total_chunks() == 5
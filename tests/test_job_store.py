@@ -0,0 +1,100 @@
+# tests/test_job_store.py
+
+import pytest
+from app.jobs.store import JobStore
+
+DOCS = [
+    {"filename": "a.pdf", "path": "/tmp/a.pdf", "sha256": "aaa"},
+    {"filename": "b.pdf", "path": "/tmp/b.pdf", "sha256": "bbb"},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(tmp_path / "jobs.sqlite3")
+
+
+def test_create_and_get_job(store):
+    """New jobs are queued with one pending entry per document."""
+    job_id = store.create_job("team-a", DOCS)
+    job = store.get_job(job_id)
+    assert job["status"] == "queued"
+    assert job["collection"] == "team-a"
+    assert [d["filename"] for d in job["documents"]] == ["a.pdf", "b.pdf"]
+    assert all(d["status"] == "pending" for d in job["documents"])
+    assert job["progress"] == 0.0
+
+
+def test_unknown_job_returns_none(store):
+    """Unknown ids return None rather than raising."""
+    assert store.get_job("missing") is None
+
+
+def test_claim_next_is_fifo_and_exclusive(store):
+    """Oldest queued job is claimed once and moves to running."""
+    first = store.create_job("c", DOCS)
+    second = store.create_job("c", DOCS)
+    assert store.claim_next() == first
+    assert store.claim_next() == second
+    assert store.claim_next() is None
+    assert store.get_job(first)["status"] == "running"
+
+
+def test_progress_tracks_embedded_chunks(store):
+    """Progress is the share of chunks embedded across documents."""
+    job_id = store.create_job("c", DOCS)
+    store.update_document(job_id, 0, status="embedding", chunks_total=10, chunks_embedded=5)
+    store.update_document(job_id, 1, status="indexed", chunks_total=4, chunks_embedded=4)
+    assert store.get_job(job_id)["progress"] == pytest.approx(0.75)
+
+
+def test_update_document_rejects_unknown_fields(store):
+    """Only progress fields can be updated."""
+    job_id = store.create_job("c", DOCS)
+    with pytest.raises(ValueError):
+        store.update_document(job_id, 0, path="/etc/passwd")
+
+
+def test_interrupted_jobs_are_requeued(store, tmp_path):
+    """Jobs left running by a crash are queued again on restart."""
+    job_id = store.create_job("c", DOCS)
+    store.claim_next()
+    restarted = JobStore(tmp_path / "jobs.sqlite3")
+    assert restarted.requeue_interrupted() == 1
+    assert restarted.claim_next() == job_id
+
+
+def test_cancel_queued_and_running(store):
+    """Queued jobs cancel immediately, running ones get a cancel flag."""
+    running = store.create_job("c", DOCS)
+    store.claim_next()
+    queued = store.create_job("c", DOCS)
+
+    assert store.request_cancel(queued)
+    assert store.get_job(queued)["status"] == "cancelled"
+    assert store.request_cancel(running)
+    assert store.get_job(running)["status"] == "running"
+    assert store.is_cancel_requested(running)
+
+
+def test_cancel_finished_job_fails(store):
+    """Finished jobs can't be cancelled."""
+    job_id = store.create_job("c", DOCS)
+    store.set_status(job_id, "completed")
+    assert not store.request_cancel(job_id)
+
+
+def test_cancel_twice_fails(store):
+    """A job that is already cancelled can't be cancelled again."""
+    job_id = store.create_job("c", DOCS)
+    assert store.request_cancel(job_id)
+    assert not store.request_cancel(job_id)
+
+
+def test_pending_hashes_only_for_active_jobs(store):
+    """Content in queued/running jobs counts as known, finished jobs don't."""
+    active = store.create_job("c", DOCS[:1])
+    done = store.create_job("c", DOCS[1:])
+    store.set_status(done, "failed")
+    assert store.pending_hashes("c") == {"aaa": "a.pdf"}
+    assert store.active_job_ids("c") == [active]
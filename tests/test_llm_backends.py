@@ -0,0 +1,130 @@
+# tests/test_llm_backends.py
+
+import asyncio
+import httpx
+import pytest
+from app.llm.backends import GroqBackend, StubBackend, LLMError
+from app.llm.generator import generate_answer
+
+CHUNKS = [{"chunk_id": 0, "text": "The CGPA is 9.1.", "source": "cv.pdf", "page": 1, "score": 0.9}]
+
+
+def ok_response(content="answer"):
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+def make_backend(handler, **kwargs):
+    kwargs.setdefault("backoff_base_s", 0.0)
+    return GroqBackend(api_key="test", transport=httpx.MockTransport(handler), **kwargs)
+
+
+def test_stub_backend_is_deterministic():
+    """Same request gives the same answer, with no network."""
+    backend = StubBackend()
+    first = asyncio.run(generate_answer("What is the CGPA?", CHUNKS, backend=backend))
+    second = asyncio.run(generate_answer("What is the CGPA?", CHUNKS, backend=backend))
+    assert first == second
+    assert "9.1" in first["answer"]
+    assert first["model"] == "local-stub"
+    assert first["sources"] == [{"source": "cv.pdf", "page": 1, "score": 0.9}]
+
+
+def test_retries_transient_errors():
+    """5xx responses are retried until one succeeds."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503) if len(calls) < 3 else ok_response("fine")
+
+    backend = make_backend(handler, max_retries=2, hedging=False)
+    assert asyncio.run(backend.complete("prompt")) == "fine"
+    assert len(calls) == 3
+
+
+def test_gives_up_after_max_retries():
+    """Persistent failures surface as LLMError."""
+    backend = make_backend(lambda request: httpx.Response(500), max_retries=1, hedging=False)
+    with pytest.raises(LLMError):
+        asyncio.run(backend.complete("prompt"))
+
+
+def test_client_errors_not_retried():
+    """4xx (other than 429) fail immediately."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, text="bad request")
+
+    backend = make_backend(handler, max_retries=3, hedging=False)
+    with pytest.raises(LLMError):
+        asyncio.run(backend.complete("prompt"))
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("body", [
+    {"choices": []},
+    {"choices": [{"message": {"content": None}}]},
+])
+def test_malformed_body_raises_llm_error(body):
+    """A 200 without the expected fields, or without text content, is an LLMError, not a crash."""
+    backend = make_backend(lambda request: httpx.Response(200, json=body), hedging=False)
+    with pytest.raises(LLMError):
+        asyncio.run(backend.complete("prompt"))
+
+
+def test_caller_cancellation_cancels_request():
+    """If the caller goes away while waiting on the hedge deadline, the request is cancelled too."""
+    cancelled = []
+
+    async def handler(request):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(request)
+            raise
+        return ok_response()
+
+    async def scenario():
+        backend = make_backend(handler, hedge_after_s=5.0)
+        call = asyncio.create_task(backend.complete("prompt"))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0.05)  # let the cancelled request unwind
+        await backend.aclose()
+
+    asyncio.run(scenario())
+    assert len(cancelled) == 1
+
+
+def test_hedged_request_wins_when_primary_is_slow():
+    """A second request is sent after the hedge deadline and the faster one is used."""
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+            return ok_response("slow")
+        return ok_response("fast")
+
+    backend = make_backend(handler, hedge_after_s=0.05)
+    assert asyncio.run(backend.complete("prompt")) == "fast"
+    assert len(calls) == 2
+
+
+def test_hedge_deadline_uses_observed_p95():
+    """Without a fixed deadline, hedging starts once enough latencies are recorded."""
+    backend = make_backend(lambda request: ok_response())
+    assert backend.hedge_deadline() is None
+    backend._latencies.extend([0.1] * 19 + [2.0])
+    assert backend.hedge_deadline() == pytest.approx(0.1)
+
+
+def test_missing_api_key_raises():
+    """Groq backend refuses to start without a key."""
+    with pytest.raises(LLMError):
+        GroqBackend(api_key=None)
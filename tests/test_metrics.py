@@ -0,0 +1,41 @@
+# tests/test_metrics.py
+
+import math
+import pytest
+from app.evaluation.metrics import recall_at_k, reciprocal_rank, ndcg_at_k
+
+RELEVANT = {("a.pdf", 1), ("a.pdf", 3)}
+
+
+def test_recall_at_k():
+    """Counts relevant items found within the cut-off."""
+    retrieved = [("a.pdf", 1), ("b.pdf", 2), ("a.pdf", 3)]
+    assert recall_at_k(retrieved, RELEVANT, k=2) == 0.5
+    assert recall_at_k(retrieved, RELEVANT, k=3) == 1.0
+
+
+def test_recall_ignores_duplicate_pages():
+    """Several chunks from the same page only count once."""
+    retrieved = [("a.pdf", 1), ("a.pdf", 1), ("a.pdf", 1)]
+    assert recall_at_k(retrieved, RELEVANT, k=3) == 0.5
+
+
+def test_reciprocal_rank():
+    """1 / rank of the first relevant hit, 0 if none."""
+    assert reciprocal_rank([("b.pdf", 1), ("a.pdf", 3)], RELEVANT) == 0.5
+    assert reciprocal_rank([("b.pdf", 1)], RELEVANT) == 0.0
+    assert reciprocal_rank([("b.pdf", 1), ("a.pdf", 3)], RELEVANT, k=1) == 0.0
+
+
+def test_ndcg_perfect_and_partial():
+    """Perfect ranking scores 1, a relevant hit at rank 2 scores less."""
+    assert ndcg_at_k([("a.pdf", 1), ("a.pdf", 3)], RELEVANT, k=2) == pytest.approx(1.0)
+    partial = ndcg_at_k([("b.pdf", 1), ("a.pdf", 1)], RELEVANT, k=2)
+    expected = (1 / math.log2(3)) / (1 + 1 / math.log2(3))
+    assert partial == pytest.approx(expected)
+
+
+def test_no_relevant_items_scores_zero():
+    """Queries without labels don't divide by zero."""
+    assert recall_at_k([("a.pdf", 1)], set(), k=1) == 0.0
+    assert ndcg_at_k([("a.pdf", 1)], set(), k=1) == 0.0
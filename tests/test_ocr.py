@@ -0,0 +1,89 @@
+# tests/test_ocr.py
+
+import fitz
+from app.ingestion.ocr import PageOCR
+from app.ingestion.pdf_loader import load_pdf_bytes
+
+
+class FakeEngine:
+    """Stand-in OCR engine that counts calls (runs inline, workers=0)."""
+
+    def __init__(self, text="scanned words", error=None):
+        self.text = text
+        self.error = error
+        self.calls = 0
+        self.dpis = []
+
+    def __call__(self, image_png: bytes, dpi: int) -> str:
+        self.calls += 1
+        self.dpis.append(dpi)
+        if self.error:
+            raise self.error
+        return self.text
+
+
+def make_pdf() -> bytes:
+    """Page 1 has a text layer, page 2 is blank (like a scan)."""
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "real text layer")
+    doc.new_page()
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_scanned_pages_are_ocrd(tmp_path):
+    """Pages without text go through OCR, others don't."""
+    engine = FakeEngine()
+    ocr = PageOCR(engine=engine, cache_dir=tmp_path, workers=0)
+    pages = load_pdf_bytes(make_pdf(), "scan.pdf", ocr=ocr)
+
+    assert [p["page"] for p in pages] == [1, 2]
+    assert pages[1]["text"] == "scanned words"
+    assert engine.calls == 1
+
+
+def test_ocr_results_are_cached(tmp_path):
+    """Re-ingesting the same scan reuses the cached OCR text."""
+    engine = FakeEngine()
+    ocr = PageOCR(engine=engine, cache_dir=tmp_path, workers=0)
+    load_pdf_bytes(make_pdf(), "scan.pdf", ocr=ocr)
+    pages = load_pdf_bytes(make_pdf(), "scan.pdf", ocr=ocr)
+
+    assert engine.calls == 1
+    assert pages[1]["text"] == "scanned words"
+
+
+def test_engine_settings_change_misses_cache(tmp_path):
+    """Cached text from other engine settings (e.g. another language) isn't reused."""
+    engine = FakeEngine()
+    for settings in ["language=eng", "language=deu"]:
+        ocr = PageOCR(engine=engine, cache_dir=tmp_path, workers=0, engine_settings=settings)
+        load_pdf_bytes(make_pdf(), "scan.pdf", ocr=ocr)
+    assert engine.calls == 2
+
+
+def test_budget_exhausted_skips_ocr(tmp_path):
+    """With no time budget left, scanned pages are skipped, not waited on."""
+    engine = FakeEngine()
+    ocr = PageOCR(engine=engine, cache_dir=tmp_path, workers=0, doc_budget_s=0)
+    pages = load_pdf_bytes(make_pdf(), "scan.pdf", ocr=ocr)
+
+    assert [p["page"] for p in pages] == [1]
+    assert engine.calls == 0
+
+
+def test_engine_gets_render_dpi(tmp_path):
+    """The engine is told the DPI the page was rendered at."""
+    engine = FakeEngine()
+    ocr = PageOCR(engine=engine, cache_dir=tmp_path, workers=0, dpi=150)
+    load_pdf_bytes(make_pdf(), "scan.pdf", ocr=ocr)
+    assert engine.dpis == [150]
+
+
+def test_engine_error_skips_page(tmp_path):
+    """A page the engine fails on is skipped, the rest of the document is kept."""
+    engine = FakeEngine(error=RuntimeError("tesseract crashed"))
+    ocr = PageOCR(engine=engine, cache_dir=tmp_path, workers=0)
+    pages = load_pdf_bytes(make_pdf(), "scan.pdf", ocr=ocr)
+    assert [p["page"] for p in pages] == [1]
@@ -11,6 +11,12 @@ def test_search_before_build_raises():
         retriever.search("test query")
 
 
+def test_parent_size_below_chunk_size_rejected():
+    """Parents smaller than their children are a settings error, caught up front."""
+    with pytest.raises(ValueError, match="PARENT_CHUNK_SIZE"):
+        Retriever(chunk_size=500, parent_size=200)
+
+
 def test_build_and_search(tmp_path):
     """Build index from a real PDF and search returns results."""
     import shutil
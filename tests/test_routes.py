@@ -0,0 +1,63 @@
+# tests/test_routes.py
+
+import asyncio
+import pytest
+from app.api import routes
+from app.api.admission import AnswerCache, NORMAL, CACHE_OR_RETRIEVAL
+
+
+class FakeStore:
+    def total_chunks(self):
+        return 10
+
+    def has_parents(self):
+        return False
+
+
+class FakeRetriever:
+    """Retriever stand-in: returns top_k made-up passages."""
+
+    store = FakeStore()
+
+    def search(self, query, top_k=3, expand_parents=True):
+        return [{"source": "doc.pdf", "page": i, "text": f"passage {i}", "score": 1.0} for i in range(top_k)]
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """Fresh answer cache and a fake LLM; records the number of chunks each answer used."""
+    calls = []
+
+    async def fake_generate_answer(query, context_chunks, hedge=True):
+        calls.append(len(context_chunks))
+        return {"answer": f"from {len(context_chunks)} chunks", "sources": [], "model": "fake"}
+
+    monkeypatch.setattr(routes, "answer_cache", AnswerCache(max_size=16))
+    monkeypatch.setattr(routes, "generate_answer", fake_generate_answer)
+    return calls
+
+
+def answer(level, top_k=3):
+    request = routes.QueryRequest(question="What is it?", top_k=top_k)
+    return asyncio.run(routes._answer(request, "default", FakeRetriever(), level))
+
+
+def test_overload_serves_answer_cached_at_full_context(generated):
+    """An answer generated normally is served from cache once the server is overloaded."""
+    assert routes.QUERY_DEGRADED_TOP_K < 3
+    first = answer(NORMAL)
+    assert first.degraded == []
+
+    cached = answer(CACHE_OR_RETRIEVAL)
+    assert cached.answer == first.answer == "from 3 chunks"
+    assert "cached_answer" in cached.degraded
+    assert generated == [3]
+
+
+def test_overload_without_cached_answer_returns_passages(generated):
+    """With nothing cached, an overloaded query gets retrieval results and no LLM call."""
+    response = answer(CACHE_OR_RETRIEVAL)
+    assert response.answer is None
+    assert "retrieval_only" in response.degraded
+    assert len(response.sources) == routes.QUERY_DEGRADED_TOP_K
+    assert generated == []
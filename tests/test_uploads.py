@@ -0,0 +1,86 @@
+# tests/test_uploads.py
+
+import hashlib
+import io
+import anyio
+import pytest
+from app.ingestion.uploads import stream_upload, load_manifest, save_manifest
+
+
+class FakeUpload:
+    """Minimal stand-in for fastapi.UploadFile."""
+
+    def __init__(self, filename: str, data: bytes):
+        self.filename = filename
+        self._stream = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        await anyio.sleep(0)  # let concurrent uploads interleave, like a real request body
+        return self._stream.read(size)
+
+
+def upload(tmp_path, name, data, known=None, **kwargs):
+    return anyio.run(
+        lambda: stream_upload(FakeUpload(name, data), tmp_path, known or {}, **kwargs)
+    )
+
+
+def test_stream_writes_file_and_hash(tmp_path):
+    """File is written in chunks and hashed on the fly."""
+    data = b"%PDF-1.4 " + b"x" * 10_000
+    result = upload(tmp_path, "doc.pdf", data, chunk_bytes=1024)
+    assert (tmp_path / "doc.pdf").read_bytes() == data
+    assert result["sha256"] == hashlib.sha256(data).hexdigest()
+    assert result["size"] == len(data)
+    assert not result["duplicate"]
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_duplicate_content_skipped(tmp_path):
+    """Same content under another name is reported as a duplicate and not stored."""
+    data = b"same bytes"
+    known = {hashlib.sha256(data).hexdigest(): "original.pdf"}
+    result = upload(tmp_path, "copy.pdf", data, known)
+    assert result["duplicate"]
+    assert result["filename"] == "original.pdf"
+    assert not (tmp_path / "copy.pdf").exists()
+
+
+def test_same_name_different_content_raises(tmp_path):
+    """A different file can't silently replace an indexed one."""
+    (tmp_path / "doc.pdf").write_bytes(b"old")
+    with pytest.raises(FileExistsError):
+        upload(tmp_path, "doc.pdf", b"new")
+    assert (tmp_path / "doc.pdf").read_bytes() == b"old"
+
+
+def test_concurrent_uploads_of_same_name(tmp_path):
+    """Two uploads racing for one name: one is stored intact, the other is rejected."""
+    first, second = b"A" * 10_000, b"B" * 10_000
+    outcomes = []
+
+    async def one(data):
+        try:
+            outcomes.append(await stream_upload(FakeUpload("x.pdf", data), tmp_path, {}, chunk_bytes=1024))
+        except FileExistsError as e:
+            outcomes.append(e)
+
+    async def race():
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(one, first)
+            tg.start_soon(one, second)
+
+    anyio.run(race)
+
+    stored = [o for o in outcomes if isinstance(o, dict)]
+    assert len(stored) == 1
+    assert sum(isinstance(o, FileExistsError) for o in outcomes) == 1
+    assert hashlib.sha256((tmp_path / "x.pdf").read_bytes()).hexdigest() == stored[0]["sha256"]
+    assert not list(tmp_path.glob(".*.part"))
+
+
+def test_manifest_round_trip(tmp_path):
+    """Manifest is empty when missing and persists what was saved."""
+    assert load_manifest(tmp_path) == {}
+    save_manifest(tmp_path, {"abc": "doc.pdf"})
+    assert load_manifest(tmp_path) == {"abc": "doc.pdf"}